@@ -0,0 +1,70 @@
+# Benchmark of the NumPy batch evaluation against evaluate() and is_winner() one position at a time
+# Usage: python benchmarks/batch_eval.py [positions]
+import os
+import random
+import sys
+import time
+
+import numpy as np
+
+# Import the engine from the folder above
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import connect4 as c4
+from connect4.batch import evaluate_boards, evaluate_bitboards, pack_positions
+
+# Function to play random games and keep positions from all of their stages, finished games included
+def random_positions(count, seed=0):
+    rng = random.Random(seed)
+    positions = []
+    while len(positions) < count:
+        position = c4.Position(c4.HUMAN)
+        plies = rng.randint(0, c4.ROWS * c4.COLS)
+        for ply in range(plies):
+            if position.is_winner(c4.HUMAN) or position.is_winner(c4.AI) or position.is_full():
+                break
+            position.play(rng.choice(c4.generate_moves(position)))
+        positions.append(position)
+    return positions
+
+# Function to score positions one at a time, returns the same arrays as evaluate_boards
+def evaluate_scalar(positions):
+    scores = []
+    winners = []
+    terminal = []
+    for position in positions:
+        scores.append(c4.evaluate(position.to_grid()))
+        if position.is_winner(c4.HUMAN):
+            winners.append(c4.HUMAN)
+        elif position.is_winner(c4.AI):
+            winners.append(c4.AI)
+        else:
+            winners.append(c4.EMPTY)
+        terminal.append(winners[-1] != c4.EMPTY or position.is_full())
+    return (np.array(scores), np.array(winners), np.array(terminal))
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    positions = random_positions(count)
+    boards = np.array([position.to_grid() for position in positions], dtype=np.int8)
+    current, mask, player = pack_positions(positions)
+
+    start = time.perf_counter()
+    expected = evaluate_scalar(positions)
+    scalar_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    from_boards = evaluate_boards(boards)
+    boards_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    from_bitboards = evaluate_bitboards(current, mask, player)
+    bitboards_time = time.perf_counter() - start
+
+    print('%d positions' % count)
+    print('method      positions/s  same result')
+    for name, results, seconds in (('scalar', expected, scalar_time), ('boards', from_boards, boards_time), ('bitboards', from_bitboards, bitboards_time)):
+        same = all(np.array_equal(result, expected_result) for result, expected_result in zip(results, expected))
+        print('%-10s  %11d  %s' % (name, count / seconds, 'yes' if same else 'NO'))
+
+if __name__ == '__main__':
+    main()
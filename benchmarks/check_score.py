@@ -0,0 +1,52 @@
+# Check of the incremental score: Position.score has to match evaluate() after every play and undo
+# Plays random games on the classic board and a few others, exits with status 1 at the first difference
+# Usage: python benchmarks/check_score.py [games]
+import os
+import random
+import sys
+import time
+
+# Import the engine from the folder above
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import connect4 as c4
+
+# Boards checked (rows, columns, line length), the games are spread evenly over them
+BOARDS = [(6, 7, 4), (7, 8, 4), (6, 7, 5), (5, 5, 3)]
+
+# Function to compare the incremental score of a position with the reference heuristic
+# Returns None if they match, or a message describing the difference
+def compare(position, step):
+    expected = c4.evaluate(position.to_grid(), position.geometry.win)
+    if position.score != expected:
+        return '%s after %s %r: incremental score %d, evaluate() %d' % (
+            '%dx%dx%d' % (position.geometry.rows, position.geometry.cols, position.geometry.win),
+            step, position.history, position.score, expected)
+    return None
+
+# Function to play a random game to its end and take it back move by move, checking the score at every step
+def check_game(rng, geometry):
+    position = c4.Position(rng.choice((c4.HUMAN, c4.AI)), geometry)
+    error = compare(position, 'the start')
+    while error is None and not position.last_move_wins() and not position.is_full():
+        position.play(rng.choice(c4.generate_moves(position)))
+        error = compare(position, 'play')
+    while error is None and position.history:
+        position.undo()
+        error = compare(position, 'undo')
+    return error
+
+def main():
+    games = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    rng = random.Random(0)
+    start = time.perf_counter()
+    for index in range(games):
+        geometry = c4.get_geometry(*BOARDS[index % len(BOARDS)])
+        error = check_game(rng, geometry)
+        if error is not None:
+            print('FAIL: ' + error)
+            return 1
+    print('%d games checked on %d boards in %.1f s, the scores match' % (games, len(BOARDS), time.perf_counter() - start))
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,90 @@
+# Benchmark of the parallel search: time to search fixed positions with 1, 2, 4, ... worker processes,
+# to a fixed depth and with iterative deepening
+# Usage: python benchmarks/parallel_speedup.py [depth]
+import os
+import sys
+import time
+
+# Import the engine from the folder above
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import connect4 as c4
+from connect4.parallel import ParallelSearch
+
+# Positions searched by the benchmark, written as the columns played from the empty board
+POSITIONS = [
+    [],
+    [3, 3, 2, 4],
+    [3, 2, 3, 3, 4, 1, 2],
+    [3, 3, 3, 3, 2, 4, 4, 2, 1],
+    [0, 6, 1, 5, 6, 0, 2, 4, 4, 2],
+]
+
+# Function to build a position from a list of columns, the human moves first
+def make_position(moves):
+    position = c4.Position(c4.HUMAN)
+    for col in moves:
+        position.play(col)
+    return position
+
+# Function to search every benchmark position with a number of workers (0 = alpha_beta without workers)
+def run(depth, workers):
+    results = []
+    start = time.perf_counter()
+    if workers == 0:
+        for moves in POSITIONS:
+            position = make_position(moves)
+            search = c4.SearchContext(c4.TranspositionTable(), ordering=c4.MoveOrdering())
+            score, move = c4.alpha_beta(position, depth, c4.ALPHA, c4.BETA, position.player, search)
+            results.append((move, score))
+    else:
+        parallel_search = ParallelSearch(workers)
+        try:
+            for moves in POSITIONS:
+                move, score, _ = parallel_search.search(make_position(moves), depth)
+                results.append((move, score))
+        finally:
+            parallel_search.close()
+    return results, time.perf_counter() - start
+
+# Function to search every benchmark position with iterative deepening up to a depth and a number of workers
+# (0 = iterative_deepening without workers)
+def run_deepening(depth, workers):
+    results = []
+    start = time.perf_counter()
+    if workers == 0:
+        for moves in POSITIONS:
+            move, score, _, _ = c4.iterative_deepening(make_position(moves), None, depth, c4.TranspositionTable())
+            results.append((move, score))
+    else:
+        parallel_search = ParallelSearch(workers)
+        try:
+            for moves in POSITIONS:
+                move, score, _, _ = parallel_search.iterative_deepening(make_position(moves), None, depth)
+                results.append((move, score))
+        finally:
+            parallel_search.close()
+    return results, time.perf_counter() - start
+
+# Function to print the time of every number of workers against the search without workers
+def compare(run_search, depth):
+    serial_results, serial_time = run_search(depth, 0)
+    print('workers  seconds  speedup  same result')
+    print('serial   %7.2f  %7.2f  yes' % (serial_time, 1.0))
+
+    workers = 1
+    while workers <= os.cpu_count():
+        results, seconds = run_search(depth, workers)
+        same = 'yes' if results == serial_results else 'NO'
+        print('%-7d  %7.2f  %7.2f  %s' % (workers, seconds, serial_time / seconds, same))
+        workers *= 2
+
+def main():
+    depth = int(sys.argv[1]) if len(sys.argv) > 1 else 7
+    print('depth %d, %d positions, %d CPU cores' % (depth, len(POSITIONS), os.cpu_count()))
+    print('fixed depth search (alpha_beta)')
+    compare(run, depth)
+    print('iterative deepening')
+    compare(run_deepening, depth)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,80 @@
+# Load generator of the game server: many connections play games with random moves at the same time
+# Usage: python -m connect4.server --port 8765 &
+#        python benchmarks/server_load.py --port 8765 --connections 200 --games 5 --time-ms 50
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import time
+
+# Import the engine from the folder above
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from connect4.rules import COLS
+from connect4.position import Position
+from connect4.server import percentile
+
+# Function to send a request and wait for its reply
+async def request(reader, writer, message):
+    writer.write((json.dumps(message) + '\n').encode())
+    await writer.drain()
+    return json.loads(await reader.readline())
+
+# Function to play games over one connection, each game open at the same time as the games of the other connections
+# Appends the latency of every AI move in seconds, returns the number of busy replies
+async def play_games(host, port, games, time_ms, rng, latencies):
+    reader, writer = await asyncio.open_connection(host, port)
+    busy = 0
+    for index in range(games):
+        reply = await request(reader, writer, {'op': 'new', 'first': rng.choice(('human', 'ai')), 'time_ms': time_ms})
+        while 'error' in reply:
+            busy += 1
+            # Back off for a while before asking again, like a real client would
+            await asyncio.sleep(rng.random() * time_ms / 1000)
+            reply = await request(reader, writer, {'op': 'new', 'first': 'human', 'time_ms': time_ms})
+        number = reply['game']
+        while reply['state'] == 'running':
+            position = Position.from_moves(reply['moves'])
+            col = rng.choice([col for col in range(COLS) if position.can_play(col)])
+            start = time.perf_counter()
+            reply = await request(reader, writer, {'op': 'play', 'game': number, 'col': col})
+            if reply.get('error') == 'busy':
+                busy += 1
+                await asyncio.sleep(rng.random() * time_ms / 1000)
+            elif 'ai_move' in reply:
+                latencies.append(time.perf_counter() - start)
+        await request(reader, writer, {'op': 'close', 'game': number})
+    writer.close()
+    await writer.wait_closed()
+    return busy
+
+async def run(args):
+    rng = random.Random(args.seed)
+    latencies = []
+    start = time.perf_counter()
+    busy = await asyncio.gather(*[play_games(args.host, args.port, args.games, args.time_ms, random.Random(rng.random()), latencies) for connection in range(args.connections)])
+    elapsed = time.perf_counter() - start
+
+    reader, writer = await asyncio.open_connection(args.host, args.port)
+    server_stats = await request(reader, writer, {'op': 'stats'})
+    writer.close()
+
+    print('%d connections, %d games in %.1f s' % (args.connections, args.connections * args.games, elapsed))
+    print('%d AI moves (%.1f/s), %d busy replies' % (len(latencies), len(latencies) / elapsed, sum(busy)))
+    if latencies:
+        print('client latency: p50 %.1f ms, p99 %.1f ms' % (percentile(latencies, 50) * 1000, percentile(latencies, 99) * 1000))
+    print('server: %s' % json.dumps(server_stats))
+
+def main():
+    parser = argparse.ArgumentParser(description='Play many games against the game server at once and report the move latency.')
+    parser.add_argument('--host', default='127.0.0.1', help='address of the server')
+    parser.add_argument('--port', type=int, default=8765, help='port of the server')
+    parser.add_argument('--connections', type=int, default=100, help='connections playing at the same time')
+    parser.add_argument('--games', type=int, default=3, help='games played one after the other by each connection')
+    parser.add_argument('--time-ms', type=int, default=50, help='time budget of every AI move')
+    parser.add_argument('--seed', type=int, default=0, help='seed of the random moves')
+    asyncio.run(run(parser.parse_args()))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,63 @@
+# Benchmark of the solver: time and nodes to solve positions with a known score
+# Usage: python benchmarks/solver.py [file ...]
+# Files have one position per line, written as the columns played (starting at 1) and its score: "4444455533212235 3"
+import os
+import sys
+import time
+
+# Import the engine from the folder above
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from connect4.solver import Solver, solve_moves
+
+# Positions solved when no file is given, with their scores
+POSITIONS = [
+    ('4444455533212235', 3),
+    ('444444555332122353', 4),
+    ('45444445553321223533', 0),
+    ('52462255445664744265', -2),
+    ('17444423333222554123', 0),
+    ('43444443335567665355', 0),
+    ('13444443151155577666', -4),
+    ('4153334576344554152222', 0),
+    ('4735554312544334736666', 0),
+    ('754444457377333112222553', -4),
+]
+
+# Function to read the positions and scores of a file
+def read_positions(path):
+    positions = []
+    with open(path) as positions_file:
+        for line in positions_file:
+            fields = line.split()
+            if fields:
+                positions.append((fields[0], int(fields[1])))
+    return positions
+
+def main():
+    positions = []
+    for path in sys.argv[1:]:
+        positions += read_positions(path)
+    if not positions:
+        positions = POSITIONS
+
+    total_seconds = 0.0
+    total_nodes = 0
+    wrong = 0
+    for moves, expected in positions:
+        # Every position gets a new solver so no position profits from the table of another
+        solver = Solver()
+        start = time.perf_counter()
+        score, _ = solve_moves(moves, solver)
+        total_seconds += time.perf_counter() - start
+        total_nodes += solver.nodes
+        if score != expected:
+            print('WRONG: %s scored %d instead of %d' % (moves, score, expected))
+            wrong += 1
+
+    count = len(positions)
+    print('%d positions, %d wrong' % (count, wrong))
+    print('mean time %.3f s, mean nodes %d, %d nodes/s' % (total_seconds / count, total_nodes / count, total_nodes / total_seconds if total_seconds else 0))
+    return 1 if wrong else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
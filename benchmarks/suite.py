@@ -0,0 +1,140 @@
+# Benchmark suite of the engine: search speed on fixed positions, microbenchmarks and peak memory
+# Usage: python benchmarks/suite.py run [--out results.json]
+#        python benchmarks/suite.py compare baseline.json results.json [--threshold 0.1]
+# Run it on a quiet machine, save the results of the main branch as the baseline and compare every change against it
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+import timeit
+import tracemalloc
+
+# Import the engine from the folder above
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import connect4 as c4
+
+# Positions of every stage of the game, written as the columns played from the empty board (starting at 1),
+# and the depth they are searched to
+POSITION_SETS = {
+    'opening': (8, ['', '4', '44', '4453', '3344', '445', '1744']),
+    'midgame': (10, ['4444455533212235', '444444555332122353', '45444445553321223533', '52462255445664744265', '17444423333222554123']),
+    'endgame': (12, ['4153334576344554152222', '4735554312544334736666', '754444457377333112222553', '134444431511555776666335', '43444443335567665355']),
+}
+
+# Number of times every timing is repeated, the fastest run counts
+REPEATS = 5
+
+# Slowdown of a result against the baseline that makes compare fail (0.1 = 10% slower)
+DEFAULT_THRESHOLD = 0.1
+
+# Function to build a position from a string of columns starting at 1
+def make_position(moves):
+    return c4.Position.from_moves([int(char) - 1 for char in moves], c4.HUMAN)
+
+# Function to search every position of a set to its depth with an empty table, returns (seconds, nodes)
+# The table is made and emptied outside the timed searches, only the searches are timed
+def search_set(depth, positions, table):
+    seconds = 0.0
+    nodes = 0
+    for moves in positions:
+        position = make_position(moves)
+        table.clear()
+        start = time.perf_counter()
+        _, _, _, searched = c4.iterative_deepening(position, None, depth, table)
+        seconds += time.perf_counter() - start
+        nodes += searched
+    return (seconds, nodes)
+
+# Function to time a function in nanoseconds per call, the fastest of REPEATS runs
+def time_calls(function, number):
+    return min(timeit.repeat(function, number=number, repeat=REPEATS)) / number * 1e9
+
+# Function to run every benchmark, returns the results as a dictionary
+# Every result has a value and says if a higher or a lower value is better
+def run():
+    results = {}
+    table = c4.TranspositionTable()
+    for name, (depth, positions) in POSITION_SETS.items():
+        seconds, nodes = min(search_set(depth, positions, table) for repeat in range(REPEATS))
+        results[name + '_time_to_depth'] = {'value': seconds / len(positions), 'unit': 's', 'better': 'lower'}
+        results[name + '_nps'] = {'value': nodes / seconds, 'unit': 'nodes/s', 'better': 'higher'}
+
+    # Microbenchmarks on a midgame position
+    position = make_position(POSITION_SETS['midgame'][1][0])
+    grid = position.to_grid()
+    results['is_winner'] = {'value': time_calls(lambda: position.is_winner(c4.HUMAN), 100000), 'unit': 'ns', 'better': 'lower'}
+    results['last_move_wins'] = {'value': time_calls(position.last_move_wins, 100000), 'unit': 'ns', 'better': 'lower'}
+    results['evaluate'] = {'value': time_calls(lambda: c4.evaluate(grid), 2000), 'unit': 'ns', 'better': 'lower'}
+    results['generate_moves'] = {'value': time_calls(lambda: c4.generate_moves(position), 100000), 'unit': 'ns', 'better': 'lower'}
+
+    def play_undo():
+        position.play(3)
+        position.undo()
+    results['play_undo'] = {'value': time_calls(play_undo, 100000), 'unit': 'ns', 'better': 'lower'}
+
+    # Peak memory of the Python objects allocated by one search, the transposition table included
+    tracemalloc.start()
+    c4.iterative_deepening(make_position(POSITION_SETS['midgame'][1][0]), None, POSITION_SETS['midgame'][0])
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    results['search_peak_memory'] = {'value': peak / 2 ** 20, 'unit': 'MB', 'better': 'lower'}
+    return results
+
+# Function to compare results with a baseline, returns the lines to print and the names of the results
+# that got slower (or bigger) than the threshold allows
+def compare(baseline, results, threshold):
+    lines = []
+    regressions = []
+    for name, result in results.items():
+        if name not in baseline:
+            lines.append('%-22s %14.6g %s  (not in the baseline)' % (name, result['value'], result['unit']))
+            continue
+        old = baseline[name]['value']
+        new = result['value']
+        # Slowdown as a fraction: 0.1 means 10% worse, negative values are improvements
+        if result['better'] == 'higher':
+            slowdown = old / new - 1 if new else float('inf')
+        else:
+            slowdown = new / old - 1 if old else 0.0
+        failed = slowdown > threshold
+        if failed:
+            regressions.append(name)
+        lines.append('%-22s %14.6g -> %14.6g %-8s %+7.1f%%%s' % (name, old, new, result['unit'], 100 * slowdown, '  SLOWER' if failed else ''))
+    return (lines, regressions)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark the engine and compare the results with a baseline.')
+    commands = parser.add_subparsers(dest='command', required=True)
+    run_parser = commands.add_parser('run', help='run the benchmarks')
+    run_parser.add_argument('--out', help='JSON file the results are written to')
+    compare_parser = commands.add_parser('compare', help='compare results with a baseline, fail on slowdowns')
+    compare_parser.add_argument('baseline', help='JSON file of the baseline results')
+    compare_parser.add_argument('results', help='JSON file of the new results')
+    compare_parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD, help='slowdown that fails the comparison (0.1 = 10%%)')
+    args = parser.parse_args(argv)
+
+    if args.command == 'run':
+        results = run()
+        for name, result in results.items():
+            print('%-22s %14.6g %s' % (name, result['value'], result['unit']))
+        if args.out:
+            with open(args.out, 'w') as out:
+                json.dump({'python': platform.python_version(), 'machine': platform.machine(), 'results': results}, out, indent=2)
+        return 0
+
+    with open(args.baseline) as baseline_file:
+        baseline = json.load(baseline_file)['results']
+    with open(args.results) as results_file:
+        results = json.load(results_file)['results']
+    lines, regressions = compare(baseline, results, args.threshold)
+    for line in lines:
+        print(line)
+    if regressions:
+        print('FAIL: %d results are more than %.0f%% worse than the baseline' % (len(regressions), 100 * args.threshold))
+        return 1
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
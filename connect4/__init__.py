@@ -0,0 +1,11 @@
+# Connect Four engine: rules, evaluation and search without any GUI
+# The parallel search lives in connect4.parallel so importing the engine does not load multiprocessing
+from connect4.rules import ROWS, COLS, WIN, HUMAN, AI, EMPTY
+from connect4.geometry import Geometry, DEFAULT_GEOMETRY, get_geometry
+from connect4.evaluation import evaluate
+from connect4.position import Position, generate_moves
+from connect4.table import TranspositionTable
+from connect4.ordering import MoveOrdering
+# WIN_SCORE is the win score of the classic board only, other boards use Geometry.win_score
+from connect4.search import INFINITY, ALPHA, BETA, WIN_SCORE, SearchTimeout, SearchStats, SearchContext, alpha_beta, iterative_deepening
+from connect4.game import Game
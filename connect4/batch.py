@@ -0,0 +1,87 @@
+# Evaluation of many positions at once with NumPy (needs numpy, the rest of the engine does not)
+# Boards are (N, rows, cols) int8 arrays laid out like Position.to_grid: row 0 is the top row,
+# HUMAN, AI and EMPTY mark the cells. The results match evaluate() and Position.is_winner() exactly.
+import numpy as np
+
+from connect4.rules import HUMAN, AI, EMPTY
+from connect4.geometry import DEFAULT_GEOMETRY
+
+# Index arrays of every geometry used so far, by geometry
+BATCH_TABLES = {}
+
+# Function to get the index arrays of a geometry, built on first use
+# Returns the bit index of every cell in the order of the flattened grid, every window as the indexes
+# of its cells in the flattened grid (shape (windows, win)) and the value of every window disc count
+def batch_tables(geometry):
+    if geometry not in BATCH_TABLES:
+        rows = geometry.rows
+        cols = geometry.cols
+        height = geometry.column_height
+        cell_bits = np.array([col * height + rows - 1 - row for row in range(rows) for col in range(cols)], dtype=np.uint64)
+        window_cells = np.array([[(rows - 1 - bit % height) * cols + bit // height for bit in window] for window in geometry.windows], dtype=np.intp)
+        window_values = np.array(geometry.window_values, dtype=np.int64)
+        BATCH_TABLES[geometry] = (cell_bits, window_cells, window_values)
+    return BATCH_TABLES[geometry]
+
+# Number of boards evaluated together, so the temporary arrays stay small for millions of boards
+BATCH_CHUNK = 16384
+
+# Function to evaluate a batch of boards
+# Returns three arrays of length N: the heuristic scores (as evaluate() gives them), the winners
+# (HUMAN, AI or EMPTY) and whether the game is over (a winner or a full board)
+# A board with lines of both players can not come up in a game, its winner is given as HUMAN
+def evaluate_boards(boards, geometry=DEFAULT_GEOMETRY):
+    boards = np.asarray(boards, dtype=np.int8)
+    if boards.ndim != 3 or boards.shape[1:] != (geometry.rows, geometry.cols):
+        raise ValueError('boards must have the shape (N, %d, %d), not %r' % (geometry.rows, geometry.cols, boards.shape))
+    _, window_cells, window_values = batch_tables(geometry)
+    count = len(boards)
+    cells = boards.reshape(count, geometry.cells)
+    scores = np.empty(count, dtype=np.int64)
+    winners = np.empty(count, dtype=np.int8)
+    terminal = np.empty(count, dtype=bool)
+
+    for start in range(0, count, BATCH_CHUNK):
+        chunk = cells[start:start + BATCH_CHUNK]
+        # Disc counts of every window of every board, shape (chunk, windows)
+        windows = chunk[:, window_cells]
+        ai_counts = np.count_nonzero(windows == AI, axis=2)
+        human_counts = np.count_nonzero(windows == HUMAN, axis=2)
+        end = start + len(chunk)
+        scores[start:end] = window_values[ai_counts + human_counts * geometry.human_step].sum(axis=1)
+
+        # A full window of one player is a line of WIN discs
+        human_wins = (human_counts == geometry.win).any(axis=1)
+        ai_wins = (ai_counts == geometry.win).any(axis=1)
+        winners[start:end] = np.where(human_wins, HUMAN, np.where(ai_wins, AI, EMPTY))
+        terminal[start:end] = human_wins | ai_wins | (chunk != EMPTY).all(axis=1)
+
+    return (scores, winners, terminal)
+
+# Function to unpack bitboards into a batch of boards
+# current and mask are arrays of the Position attributes, player is the player to move of every
+# position (an array, or one player for all of them)
+# The bitboards have to fit in 64 bits, which boards of up to 9 columns of 6 rows or 8 columns of 7 rows do
+def boards_from_bitboards(current, mask, player, geometry=DEFAULT_GEOMETRY):
+    if geometry.cols * geometry.column_height > 64:
+        raise ValueError('the bitboards of a %dx%d board do not fit in 64 bits' % (geometry.rows, geometry.cols))
+    cell_bits, _, _ = batch_tables(geometry)
+    current = np.asarray(current, dtype=np.uint64)
+    mask = np.asarray(mask, dtype=np.uint64)
+    player = np.broadcast_to(np.asarray(player, dtype=np.int8), current.shape)
+    # One column per cell of the flattened grid, 1 where the bit is set
+    occupied = (mask[:, None] >> cell_bits) & np.uint64(1)
+    own = (current[:, None] >> cell_bits) & np.uint64(1)
+    cells = np.where(occupied == 0, EMPTY, np.where(own == 1, player[:, None], -player[:, None]))
+    return cells.astype(np.int8).reshape(len(current), geometry.rows, geometry.cols)
+
+# Function to evaluate a batch of bitboards, returns the same arrays as evaluate_boards
+def evaluate_bitboards(current, mask, player, geometry=DEFAULT_GEOMETRY):
+    return evaluate_boards(boards_from_bitboards(current, mask, player, geometry), geometry)
+
+# Function to pack a list of Position objects into bitboard arrays (current, mask, player)
+def pack_positions(positions):
+    current = np.array([position.current for position in positions], dtype=np.uint64)
+    mask = np.array([position.mask for position in positions], dtype=np.uint64)
+    player = np.array([position.player for position in positions], dtype=np.int8)
+    return (current, mask, player)
@@ -0,0 +1,126 @@
+# Opening book: best moves of the early positions, searched once offline and looked up during games
+# Generate with: python -m connect4.book --max-ply 8 --depth 10 --out opening_book.bin
+import argparse
+import mmap
+import struct
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from connect4.rules import ROWS, COLS, HUMAN, AI
+from connect4.geometry import DEFAULT_GEOMETRY
+from connect4.position import Position, generate_moves
+from connect4.table import TranspositionTable
+from connect4.search import iterative_deepening
+
+# File layout: a header followed by the entries sorted by key
+# Header: magic, version, rows, columns, last ply in the book, number of entries
+BOOK_HEADER = struct.Struct('<4sBBBBI')
+BOOK_MAGIC = b'C4OB'
+BOOK_VERSION = 1
+# Entry: canonical position key, best move and score (11 bytes)
+BOOK_ENTRY = struct.Struct('<Qbh')
+
+# Memory cap of the transposition table of each generator process in megabytes
+BOOK_TT_SIZE_MB = 16
+
+# Opening book file read through mmap, entries are found by binary search without loading the file
+# Books are made for the classic board, positions on other boards are never found in them
+class OpeningBook:
+    def __init__(self, path):
+        self.file = open(path, 'rb')
+        self.data = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, rows, cols, self.max_ply, self.count = BOOK_HEADER.unpack_from(self.data, 0)
+        if magic != BOOK_MAGIC or version != BOOK_VERSION:
+            raise ValueError('%s is not an opening book' % path)
+        if (rows, cols) != (ROWS, COLS):
+            raise ValueError('%s is a book for a %dx%d board' % (path, rows, cols))
+
+    # Function to look a position up, returns (best move, score) or None if it is not in the book
+    def lookup(self, position):
+        if position.geometry is not DEFAULT_GEOMETRY:
+            return None
+        key, mirrored = position.canonical_key()
+        low = 0
+        high = self.count - 1
+        while low <= high:
+            middle = (low + high) // 2
+            entry_key, move, score = BOOK_ENTRY.unpack_from(self.data, BOOK_HEADER.size + middle * BOOK_ENTRY.size)
+            if entry_key < key:
+                low = middle + 1
+            elif entry_key > key:
+                high = middle - 1
+            else:
+                # The book stores the move of the canonical position, mirror it back if needed
+                return (COLS - 1 - move if mirrored else move, score)
+        return None
+
+    # Function to close the file
+    def close(self):
+        self.data.close()
+        self.file.close()
+
+# Function to list the positions of the book: every position up to max_ply discs that is not over yet
+# Mirror images are listed once, each position is given by the columns played to reach it
+def book_positions(max_ply, first_player=HUMAN):
+    seen = set()
+    positions = []
+    frontier = [[]]
+    for ply in range(max_ply + 1):
+        next_frontier = []
+        for moves in frontier:
+            position = Position.from_moves(moves, first_player)
+            key, _ = position.canonical_key()
+            if key in seen or position.is_winner(HUMAN) or position.is_winner(AI) or position.is_full():
+                continue
+            seen.add(key)
+            positions.append(moves)
+            if ply < max_ply:
+                for col in generate_moves(position):
+                    next_frontier.append(moves + [col])
+        frontier = next_frontier
+    return positions
+
+# Transposition table of a generator process, kept for all the positions it searches
+generator_table = None
+
+# Function run by a generator process: searches one position, returns (canonical key, best move, score)
+def search_book_position(moves, depth, first_player):
+    global generator_table
+    if generator_table is None:
+        generator_table = TranspositionTable(BOOK_TT_SIZE_MB)
+    position = Position.from_moves(moves, first_player)
+    key, mirrored = position.canonical_key()
+    move, score, _, _ = iterative_deepening(position, None, depth, generator_table)
+    # Keep the move of the canonical position and a score that fits in the entry
+    score = max(-32768, min(32767, score))
+    return (key, COLS - 1 - move if mirrored else move, score)
+
+# Function to search every book position and write the sorted book file
+def generate(path, max_ply, depth, workers=None, first_player=HUMAN):
+    positions = book_positions(max_ply, first_player)
+    with ProcessPoolExecutor(workers) as executor:
+        entries = list(executor.map(search_book_position, positions, [depth] * len(positions), [first_player] * len(positions), chunksize=64))
+    entries.sort()
+
+    with open(path, 'wb') as book_file:
+        book_file.write(BOOK_HEADER.pack(BOOK_MAGIC, BOOK_VERSION, ROWS, COLS, max_ply, len(entries)))
+        for entry in entries:
+            book_file.write(BOOK_ENTRY.pack(*entry))
+    return len(entries)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Generate an opening book by searching every position up to a ply.')
+    parser.add_argument('--max-ply', type=int, default=6, help='book every position with up to this many discs')
+    parser.add_argument('--depth', type=int, default=8, help='search depth for every book position')
+    parser.add_argument('--workers', type=int, default=None, help='number of worker processes (default: one per CPU core)')
+    parser.add_argument('--out', default='opening_book.bin', help='book file to write')
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    count = generate(args.out, args.max_ply, args.depth, args.workers)
+    print('%d positions written to %s in %.1f s' % (count, args.out, time.perf_counter() - start))
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,62 @@
+# Heuristic evaluation of positions from the point of view of the AI (positive is good for the AI)
+from connect4.rules import WIN, HUMAN, AI
+
+# Function to score a window of WIN cells from the number of AI and human discs in it
+# Windows with discs of only one player count more the fuller they are, mixed windows can not be won by anyone
+def window_value(ai_count, human_count):
+    if human_count == 0 and ai_count > 0:
+        return 10 ** (ai_count - 1) + 10
+    elif ai_count == 0 and human_count > 0:
+        return -(10 ** (human_count - 1) + 10)
+    elif ai_count > human_count:
+        return 1
+    elif human_count > ai_count:
+        return -1
+    else:
+        return 0
+
+# Create a function to evaluate how good a board state is for each player using a scoring heuristic
+# This scans every window of the grid, the search uses the score kept up to date by Position instead
+# The board can have any size, win is the length of a winning line
+def evaluate(board, win=WIN):
+    rows = len(board)
+    cols = len(board[0])
+    # Initialize the score to zero
+    score = 0
+    # Loop through each row and column of the board as the first slot of a line
+    for row in range(rows):
+        for col in range(cols):
+            # Check horizontal, vertical and both diagonal lines (positive slope goes up to the right)
+            for row_step, col_step in ((0, 1), (1, 0), (-1, 1), (1, 1)):
+                # Skip lines that leave the board
+                end_row = row + (win - 1) * row_step
+                end_col = col + (win - 1) * col_step
+                if not (0 <= end_row < rows and end_col < cols):
+                    continue
+
+                # Initialize counters for red and yellow discs
+                red_count = 0
+                yellow_count = 0
+                # Loop through each slot of the line
+                for i in range(win):
+                    # Check if the slot is red or yellow and increment the corresponding counter
+                    if board[row + i * row_step][col + i * col_step] == HUMAN:
+                        red_count += 1
+                    elif board[row + i * row_step][col + i * col_step] == AI:
+                        yellow_count += 1
+
+                # Add the line value to the score
+                score += window_value(yellow_count, red_count)
+
+    # Return the score
+    return score
+
+# Evaluations the search can be configured with, by name
+EVALUATIONS = {
+    # The window heuristic kept up to date by Position (the default)
+    'windows': None,
+    # The same heuristic computed by scanning the whole grid, slow but useful to compare against
+    'reference': lambda position: evaluate(position.to_grid(), position.geometry.win),
+    # No heuristic at all, only wins and losses count
+    'none': lambda position: 0,
+}
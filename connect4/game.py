@@ -0,0 +1,79 @@
+# A game between the human and the AI, without any GUI
+from connect4.rules import HUMAN, AI
+from connect4.geometry import DEFAULT_GEOMETRY
+from connect4.position import Position
+from connect4.table import TT_SIZE_MB, TranspositionTable
+from connect4.search import iterative_deepening
+
+class Game:
+    def __init__(self, first_player=HUMAN, table_size_mb=TT_SIZE_MB, book=None, geometry=DEFAULT_GEOMETRY):
+        # The position on the board and the player who moved first
+        self.position = Position(first_player, geometry)
+        self.first_player = first_player
+        # Transposition table shared by all AI searches of the game, made by the first search
+        # so games whose moves are searched somewhere else (like the server's workers) do not hold one
+        self.table = None
+        self.table_size_mb = table_size_mb
+        # Opening book (connect4.book.OpeningBook) looked up before searching, or None
+        self.book = book
+        # The game state (running or over)
+        self.state = 'running'
+        # The game result for the human player (win, lose, draw or None)
+        self.result = None
+
+    # Function to check if a disc can be dropped into a column
+    def can_play(self, col):
+        return self.state == 'running' and 0 <= col < self.position.geometry.cols and self.position.can_play(col)
+
+    # Function to drop a disc of the player to move into a column and update the game state
+    def play(self, col):
+        if not self.can_play(col):
+            raise ValueError('column %r can not be played' % (col,))
+        self.position.play(col)
+
+        # Check if there is a winner or the board is full
+        if self.position.is_winner(HUMAN):
+            self.state = 'over'
+            self.result = 'win'
+        elif self.position.is_winner(AI):
+            self.state = 'over'
+            self.result = 'lose'
+        elif self.position.is_full():
+            self.state = 'over'
+            self.result = 'draw'
+
+    # Function to look the position up in the opening book, returns (best move, score) or None
+    def book_move(self):
+        if self.book is None:
+            return None
+        return self.book.lookup(self.position)
+
+    # Function to search for the best move of the player to move
+    # Returns the best move and score, the depth reached and the number of nodes searched (0 for book moves)
+    # The search runs on a copy of the position, so it can run in another thread while the game is drawn
+    def best_move(self, time_ms=None, max_depth=None, search=None):
+        entry = self.book_move()
+        if entry is not None:
+            return (entry[0], entry[1], 0, 0)
+        if self.table is None:
+            self.table = TranspositionTable(self.table_size_mb)
+        return iterative_deepening(self.position.copy(), time_ms, max_depth, self.table, search=search)
+
+    # Function to find the best move with perfect play, only fast enough once the board is about half full
+    # Returns the best move, its exact score and the outcome for the player to move ('win', 'draw' or 'loss')
+    # with the number of plies until the game ends
+    def solve(self, solver=None):
+        # The solver is only loaded when a game asks for it, so "python -m connect4.solver" does not load it twice
+        from connect4.solver import Solver, describe
+        if self.state != 'running':
+            raise ValueError('the game is already over')
+        if solver is None:
+            solver = Solver()
+        position = self.position.copy()
+        move, score = solver.best_move(position)
+        outcome, plies = describe(score, position)
+        return (move, score, outcome, plies)
+
+    # Function to get the board as a list of lists (row 0 is the top row)
+    def board(self):
+        return self.position.to_grid()
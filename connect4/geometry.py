@@ -0,0 +1,110 @@
+# Geometry of a board: its size, the line length that wins, and every table that depends on them
+# The tables are built once for each (rows, cols, win) and shared by all positions on such a board
+from connect4.rules import ROWS, COLS, WIN
+from connect4.evaluation import window_value
+
+class Geometry:
+    def __init__(self, rows, cols, win):
+        if rows < 1 or cols < 1 or win < 2 or win > max(rows, cols):
+            raise ValueError('no lines of %d fit on a %dx%d board' % (win, rows, cols))
+        self.rows = rows
+        self.cols = cols
+        self.win = win
+        self.cells = rows * cols
+
+        # Bitboard layout: every column takes rows + 1 bits, counted from the bottom
+        # cell upwards. The extra bit on top of each column always stays empty so that
+        # shifted lines can never wrap from one column into the next.
+        # Bit index of a cell = col * (rows + 1) + height, where height 0 is the bottom row
+        self.column_height = rows + 1
+
+        # Masks with the bottom cell, top cell and every cell of each column
+        self.bottom_masks = [1 << (col * self.column_height) for col in range(cols)]
+        self.top_masks = [1 << (rows - 1 + col * self.column_height) for col in range(cols)]
+        self.column_masks = [((1 << rows) - 1) << (col * self.column_height) for col in range(cols)]
+
+        # Mask of every playable cell, used to check if the board is full
+        self.board_mask = sum(self.column_masks)
+
+        # Mask with the bottom cell of every column, used to find the playable cells
+        self.bottom_row_mask = sum(self.bottom_masks)
+
+        # Bit distances between neighbouring cells: vertical, horizontal and both diagonals
+        self.directions = (1, self.column_height, self.column_height - 1, self.column_height + 1)
+
+        # For every direction and every gap in a line, the bit distances from the gap to the other win - 1 cells
+        self.line_offsets = [tuple((i - gap) * shift for i in range(win) if i != gap) for shift in self.directions for gap in range(win)]
+
+        # Columns from the center outwards, the center takes part in the most lines
+        self.center_order = sorted(range(cols), key=lambda col: abs(2 * col - (cols - 1)))
+
+        # Every window of win cells, each one a tuple of bit indexes (69 on the classic board)
+        self.windows = []
+        for col in range(cols):
+            for height in range(rows):
+                # Vertical, horizontal and both diagonal windows starting at this cell
+                for col_step, height_step in ((0, 1), (1, 0), (1, 1), (1, -1)):
+                    end_col = col + (win - 1) * col_step
+                    end_height = height + (win - 1) * height_step
+                    if end_col < cols and 0 <= end_height < rows:
+                        self.windows.append(tuple((col + i * col_step) * self.column_height + height + i * height_step for i in range(win)))
+
+        # Windows through each cell, indexed by bit index
+        cell_windows = [[] for i in range(cols * self.column_height)]
+        for window_index, window in enumerate(self.windows):
+            for cell in window:
+                cell_windows[cell].append(window_index)
+        self.cell_windows = [tuple(windows) for windows in cell_windows]
+
+        # The disc counts of a window are stored as one number: ai_count + human_count * (win + 1)
+        self.ai_step = 1
+        self.human_step = win + 1
+
+        # Value of a window for each stored disc count
+        self.window_values = [window_value(code % self.human_step, code // self.human_step) for code in range(self.human_step * self.human_step)]
+
+        # Score of a won game: the next power of ten above the heuristic score of any position that is not won
+        self.win_score = 10 ** len(str(len(self.windows) * window_value(win - 1, 0)))
+
+    # Geometries are rebuilt through the cache when they are sent to other processes
+    def __reduce__(self):
+        return (get_geometry, (self.rows, self.cols, self.win))
+
+    def __repr__(self):
+        return 'Geometry(%d, %d, %d)' % (self.rows, self.cols, self.win)
+
+    # Function to mirror a bitboard left to right, each column is moved with its extra top bit
+    def mirror(self, bits):
+        mirrored = 0
+        column_bits = (1 << self.column_height) - 1
+        for col in range(self.cols):
+            mirrored |= ((bits >> (col * self.column_height)) & column_bits) << ((self.cols - 1 - col) * self.column_height)
+        return mirrored
+
+    # Function to check if a set of discs contains a line of win discs
+    def has_line(self, discs):
+        # Loop through each direction
+        for shift in self.directions:
+            # Keep only the discs that have win - 1 neighbours of the same player in this direction
+            line = discs
+            for i in range(1, self.win):
+                line &= discs >> (i * shift)
+            # Any bit left over marks the start of a complete line
+            if line:
+                return True
+
+        # Return False if there is no line in any direction
+        return False
+
+# Geometries built so far, by (rows, cols, win)
+GEOMETRIES = {}
+
+# Function to get the geometry of a board, built on first use
+def get_geometry(rows=ROWS, cols=COLS, win=WIN):
+    key = (rows, cols, win)
+    if key not in GEOMETRIES:
+        GEOMETRIES[key] = Geometry(rows, cols, win)
+    return GEOMETRIES[key]
+
+# The classic board: 6 rows, 7 columns, lines of 4
+DEFAULT_GEOMETRY = get_geometry()
@@ -0,0 +1,77 @@
+# Move ordering for the search
+from connect4.geometry import DEFAULT_GEOMETRY
+
+# Move ordering for alpha_beta: the sooner the best move is searched, the more of the tree is pruned
+# Each stage can be switched off to measure what it gains
+class MoveOrdering:
+    def __init__(self, center=True, killers=True, history=True, tactics=True):
+        # Search the center columns first
+        self.center = center
+        # Search moves that caused a cutoff at the same ply first
+        self.use_killers = killers
+        # Search moves that caused many deep cutoffs anywhere in the tree first
+        self.use_history = history
+        # Search immediate wins and blocks of the opponent's wins first
+        self.tactics = tactics
+        # Board the killer moves and history scores are sized for, changed by the first position of another board
+        self.geometry = DEFAULT_GEOMETRY
+        self.clear()
+
+    # Function to forget the killer moves and history scores
+    def clear(self):
+        geometry = self.geometry
+        # Two killer moves for every ply
+        self.killers = [[None, None] for ply in range(geometry.cells + 1)]
+        # History scores of every player (human at index 1, AI at index -1) and cell
+        self.history = [None, [0] * (geometry.cols * geometry.column_height), [0] * (geometry.cols * geometry.column_height)]
+
+    # Function to get the moves of a position in the order they should be searched
+    def order(self, position, tt_move=None):
+        geometry = position.geometry
+        if geometry is not self.geometry:
+            self.geometry = geometry
+            self.clear()
+        columns = geometry.center_order if self.center else range(geometry.cols)
+        moves = [col for col in columns if position.can_play(col)]
+        if len(moves) < 2:
+            return moves
+
+        # Every move gets a priority, moves with the same priority keep the column order
+        priorities = {}
+        if self.use_history:
+            history = self.history[position.player]
+            for col in moves:
+                priorities[col] = history[position.landing_cell(col)]
+        else:
+            priorities = dict.fromkeys(moves, 0)
+
+        ply = len(position.history)
+        if self.use_killers:
+            for rank, killer in enumerate(self.killers[ply]):
+                if killer in priorities:
+                    priorities[killer] = 2 ** 60 - rank
+        if tt_move in priorities:
+            priorities[tt_move] = 2 ** 61
+
+        if self.tactics:
+            playable = position.playable_cells()
+            # Drop a disc where the opponent would win next move, or better, where the player wins now
+            for cells, priority in ((position.winning_cells(-position.player), 2 ** 62), (position.winning_cells(position.player), 2 ** 63)):
+                cells &= playable
+                if cells:
+                    for col in moves:
+                        if cells & geometry.column_masks[col]:
+                            priorities[col] = priority
+
+        moves.sort(key=priorities.get, reverse=True)
+        return moves
+
+    # Function to remember a move that caused a cutoff
+    def cutoff(self, position, col, depth):
+        if self.use_killers:
+            killers = self.killers[len(position.history)]
+            if killers[0] != col:
+                killers[1] = killers[0]
+                killers[0] = col
+        if self.use_history:
+            self.history[position.player][position.landing_cell(col)] += depth * depth
@@ -0,0 +1,155 @@
+# Parallel search over a pool of worker processes
+import time
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+from connect4.rules import AI
+from connect4.table import TT_SIZE_MB, TranspositionTable
+from connect4.ordering import MoveOrdering
+from connect4.search import INFINITY, ALPHA, BETA, SearchTimeout, SearchContext, alpha_beta, terminal_score
+
+# Search state of a worker process of the parallel search
+worker_bound = None
+worker_stop = None
+worker_table = None
+worker_ordering = None
+worker_search_id = None
+
+# Function to set up a worker process of the parallel search
+def start_worker(bound, stop, table_size_mb):
+    global worker_bound, worker_stop, worker_table, worker_ordering
+    worker_bound = bound
+    worker_stop = stop
+    worker_table = TranspositionTable(table_size_mb)
+    worker_ordering = MoveOrdering()
+
+# Function run by a worker process: searches one move of the root position
+# Returns the move, its score (None if the search was cancelled or the time ran out) and the number of nodes searched
+def search_root_move(position, col, depth, search_id, deadline):
+    global worker_search_id
+    # Every search starts with an empty table, so the result does not depend on earlier searches
+    # The depths of one iterative deepening are one search, so they share the table and move ordering like alpha_beta does
+    if search_id != worker_search_id:
+        worker_table.clear()
+        worker_ordering.clear()
+        worker_search_id = search_id
+
+    # The shared bound holds the best score found so far at the root, seen from the player at the root
+    sign = 1 if position.player == AI else -1
+    bound = worker_bound.value
+    alpha = ALPHA
+    beta = BETA
+    # Only scores better than the bound matter, one point below it keeps moves with an equal score exact
+    if bound != -INFINITY:
+        if sign == 1:
+            alpha = bound - 1
+        else:
+            beta = -bound + 1
+
+    player = position.player
+    position.play(col)
+    search = SearchContext(worker_table, deadline, worker_ordering, worker_stop)
+    try:
+        score, _ = alpha_beta(position, depth - 1, alpha, beta, -player, search)
+    except SearchTimeout:
+        return (col, None, search.nodes)
+
+    # Share the score with the other workers if it is the best one so far
+    with worker_bound.get_lock():
+        if sign * score > worker_bound.value:
+            worker_bound.value = sign * score
+    return (col, score, search.nodes)
+
+# Parallel search that splits the moves of the root position between worker processes
+# At equal depth it finds the same move and score as alpha_beta searching alone
+class ParallelSearch:
+    def __init__(self, workers=None, table_size_mb=TT_SIZE_MB):
+        # Best score found so far at the root, shared by all workers
+        self.bound = multiprocessing.Value('d', -INFINITY)
+        # Set to cancel the search in every worker
+        self.stop = multiprocessing.Event()
+        self.executor = ProcessPoolExecutor(workers, initializer=start_worker, initargs=(self.bound, self.stop, table_size_mb))
+        self.searches = 0
+        # Progress of the running iterative deepening: depth being searched and nodes searched so far
+        self.depth = 0
+        self.nodes = 0
+
+    # Function to search a position to a fixed depth, returns (best move, best score, nodes)
+    # The best move is None if the search was cancelled or the deadline passed before every move was searched
+    # Searches with the same search_id keep the tables of the workers, a new search_id is taken if none is given
+    def search(self, position, depth, moves=None, deadline=None, search_id=None):
+        # Nothing to split if the game is already over
+        score = terminal_score(position)
+        if score is not None:
+            return (None, score, 1)
+        if depth == 0:
+            return (None, position.score, 1)
+        if moves is None:
+            moves = MoveOrdering().order(position)
+        if search_id is None:
+            search_id = self.new_search_id()
+        self.bound.value = -INFINITY
+
+        futures = [self.executor.submit(search_root_move, position, col, depth, search_id, deadline) for col in moves]
+        results = [future.result() for future in futures]
+        nodes = 1 + sum(result[2] for result in results)
+        if any(score is None for _, score, _ in results):
+            return (None, None, nodes)
+
+        # Pick the best score, the first move in search order wins ties like in alpha_beta
+        sign = 1 if position.player == AI else -1
+        best_move, best_score, _ = max(results, key=lambda result: sign * result[1])
+        return (best_move, best_score, nodes)
+
+    # Function to get a search_id that no search has used yet
+    def new_search_id(self):
+        self.searches += 1
+        return self.searches
+
+    # Function to search deeper and deeper in parallel until the time budget or depth limit is reached
+    # Returns the best move and score of the last completed depth, the depth reached and the number of nodes searched
+    def iterative_deepening(self, position, time_ms=None, max_depth=None):
+        self.stop.clear()
+        empty_cells = position.geometry.cells - bin(position.mask).count('1')
+        if max_depth is None or max_depth > empty_cells:
+            max_depth = empty_cells
+
+        start = time.perf_counter()
+        moves = MoveOrdering().order(position)
+        best_move = None
+        best_score = None
+        depth_reached = 0
+        self.nodes = 0
+        deadline = None
+        search_id = self.new_search_id()
+
+        for depth in range(1, max_depth + 1):
+            self.depth = depth
+            move, score, searched = self.search(position, depth, moves, deadline, search_id)
+            self.nodes += searched
+            if move is None:
+                break
+
+            best_move = move
+            best_score = score
+            depth_reached = depth
+            # Search the best move of this depth first at the next depth
+            moves.remove(move)
+            moves.insert(0, move)
+
+            # The clock only starts to count once the first depth has found a move
+            if time_ms is not None:
+                deadline = start + time_ms / 1000
+                if time.perf_counter() >= deadline:
+                    break
+
+        return (best_move, best_score, depth_reached, self.nodes)
+
+    # Function to cancel the running search, it returns the result of the last completed depth
+    def cancel(self):
+        self.stop.set()
+
+    # Function to stop the worker processes
+    def close(self):
+        self.cancel()
+        self.executor.shutdown(cancel_futures=True)
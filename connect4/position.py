@@ -0,0 +1,179 @@
+# Position of a game stored as bitboards
+from connect4.rules import HUMAN, AI, EMPTY
+from connect4.geometry import DEFAULT_GEOMETRY
+
+# Position stored as two integers: the discs of the player to move and all discs on the board
+class Position:
+    def __init__(self, player=HUMAN, geometry=DEFAULT_GEOMETRY):
+        # Board size, line length and the tables built for them
+        self.geometry = geometry
+        # Discs of the player to move
+        self.current = 0
+        # Discs of both players
+        self.mask = 0
+        # The player to move
+        self.player = player
+        # Columns played so far, needed to undo moves
+        self.history = []
+        # Disc counts of every window and the sum of their values, kept up to date by play and undo
+        self.window_counts = [0] * len(geometry.windows)
+        self.score = 0
+
+    # Function to create a position from a list of lists board
+    @classmethod
+    def from_grid(cls, grid, player, geometry=DEFAULT_GEOMETRY):
+        position = cls(player, geometry)
+        for row in range(geometry.rows):
+            for col in range(geometry.cols):
+                if grid[row][col] != EMPTY:
+                    # Row 0 of the grid is the top of the board
+                    bit = 1 << (col * geometry.column_height + geometry.rows - 1 - row)
+                    position.mask |= bit
+                    if grid[row][col] == player:
+                        position.current |= bit
+                    position.update_windows(bit.bit_length() - 1, geometry.ai_step if grid[row][col] == AI else geometry.human_step)
+        return position
+
+    # Function to create a position by playing a list of columns from the empty board
+    @classmethod
+    def from_moves(cls, moves, player=HUMAN, geometry=DEFAULT_GEOMETRY):
+        position = cls(player, geometry)
+        for col in moves:
+            position.play(col)
+        return position
+
+    # Function to copy the position, so it can be searched while the original one is in use
+    def copy(self):
+        position = Position(self.player, self.geometry)
+        position.current = self.current
+        position.mask = self.mask
+        position.history = self.history[:]
+        position.window_counts = self.window_counts[:]
+        position.score = self.score
+        return position
+
+    # Function to convert the position back to a list of lists board (used by the GUI)
+    def to_grid(self):
+        geometry = self.geometry
+        grid = []
+        for row in range(geometry.rows):
+            grid_row = []
+            for col in range(geometry.cols):
+                bit = 1 << (col * geometry.column_height + geometry.rows - 1 - row)
+                if not self.mask & bit:
+                    grid_row.append(EMPTY)
+                elif self.current & bit:
+                    grid_row.append(self.player)
+                else:
+                    grid_row.append(-self.player)
+            grid.append(grid_row)
+        return grid
+
+    # Function to get the discs of a given player
+    def discs(self, player):
+        if player == self.player:
+            return self.current
+        return self.current ^ self.mask
+
+    # Function to check if a disc can be dropped into a column
+    def can_play(self, col):
+        return not self.mask & self.geometry.top_masks[col]
+
+    # Function to add (positive step) or remove (negative step) a disc in the windows through a cell
+    # Only the windows through the cell change, so the score is updated without looking at the rest of the board
+    def update_windows(self, cell, step):
+        counts = self.window_counts
+        values = self.geometry.window_values
+        score = self.score
+        for window_index in self.geometry.cell_windows[cell]:
+            code = counts[window_index]
+            counts[window_index] = code + step
+            score += values[code + step] - values[code]
+        self.score = score
+
+    # Function to drop a disc of the player to move into a column
+    def play(self, col):
+        # Adding the bottom bit fills the lowest empty cell of the column
+        geometry = self.geometry
+        mask = self.mask | (self.mask + geometry.bottom_masks[col])
+        cell = (mask ^ self.mask).bit_length() - 1
+        self.update_windows(cell, geometry.ai_step if self.player == AI else geometry.human_step)
+        # The discs of the player to move become the opponent's discs
+        self.current ^= self.mask
+        self.mask = mask
+        self.player = -self.player
+        self.history.append(col)
+
+    # Function to take back the last move
+    def undo(self):
+        col = self.history.pop()
+        # The last disc played is the highest disc in its column
+        geometry = self.geometry
+        cell = (self.mask & geometry.column_masks[col]).bit_length() - 1
+        self.mask ^= 1 << cell
+        self.current ^= self.mask
+        self.player = -self.player
+        self.update_windows(cell, -geometry.ai_step if self.player == AI else -geometry.human_step)
+
+    # Function to check if there is a winner
+    def is_winner(self, player):
+        return self.geometry.has_line(self.discs(player))
+
+    # Function to check if the last move made a line, only the windows through its disc are looked at
+    # Positions without moves to look back on (built with from_grid) check the whole board instead
+    def last_move_wins(self):
+        if not self.history:
+            return self.is_winner(-self.player)
+        geometry = self.geometry
+        cell = (self.mask & geometry.column_masks[self.history[-1]]).bit_length() - 1
+        # The disc counts of a window full of the discs of the player who made the last move
+        line = geometry.win * (geometry.human_step if self.player == AI else geometry.ai_step)
+        counts = self.window_counts
+        for window_index in geometry.cell_windows[cell]:
+            if counts[window_index] == line:
+                return True
+        return False
+
+    # Function to check if the board is full
+    def is_full(self):
+        return self.mask == self.geometry.board_mask
+
+    # Function to get the bit index of the cell a disc dropped into a column lands on
+    def landing_cell(self, col):
+        geometry = self.geometry
+        return ((self.mask + geometry.bottom_masks[col]) & geometry.column_masks[col]).bit_length() - 1
+
+    # Function to get the cells where a disc can be dropped, one per column that is not full
+    def playable_cells(self):
+        return (self.mask + self.geometry.bottom_row_mask) & self.geometry.board_mask
+
+    # Function to get the empty cells that would complete a line for a player
+    def winning_cells(self, player):
+        discs = self.discs(player)
+        cells = 0
+        board_mask = self.geometry.board_mask
+        for offsets in self.geometry.line_offsets:
+            # Keep the cells whose other win - 1 cells in this line all hold the player's discs
+            line = board_mask
+            for offset in offsets:
+                line &= discs >> offset if offset > 0 else discs << -offset
+            cells |= line
+        return cells & ~self.mask
+
+    # Function to get a unique key for the position, used by the transposition table
+    # current + mask is different for every board and never carries from one column into the next
+    def key(self):
+        return ((self.current + self.mask) << 1) | (self.player == AI)
+
+    # Function to get the same key for a position and its mirror image
+    # Returns the smaller of the two keys and True if it is the key of the mirror image
+    def canonical_key(self):
+        key = self.key()
+        mirrored_key = (self.geometry.mirror(self.current + self.mask) << 1) | (self.player == AI)
+        if mirrored_key < key:
+            return (mirrored_key, True)
+        return (key, False)
+
+# Function to generate all possible moves (playable columns) for a given position
+def generate_moves(position):
+    return [col for col in range(position.geometry.cols) if position.can_play(col)]
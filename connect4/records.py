@@ -0,0 +1,227 @@
+# Game records: finished games stored as a header and one byte per move, appended to a log file
+# Usage: python -m connect4.records info games.c4r
+#        python -m connect4.records analyze games.c4r --depth 8 --out analysis.jsonl
+#
+# File layout: a file header (magic, version) followed by the records, one after the other
+# Record: rows, columns, line length, first player, winner, number of moves, then the columns played
+import argparse
+import collections
+import json
+import os
+import struct
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from connect4.rules import HUMAN, AI, EMPTY
+from connect4.geometry import DEFAULT_GEOMETRY, get_geometry
+from connect4.position import Position
+from connect4.table import TT_SIZE_MB, TranspositionTable
+from connect4.search import iterative_deepening
+
+RECORD_FILE_HEADER = struct.Struct('<4sB')
+RECORD_MAGIC = b'C4GR'
+RECORD_VERSION = 1
+RECORD_HEADER = struct.Struct('<BBBbBH')
+
+# Winners as stored in a record: unfinished game, human, AI, draw
+WINNER_CODES = {None: 0, HUMAN: 1, AI: 2, EMPTY: 3}
+WINNERS = {code: winner for winner, code in WINNER_CODES.items()}
+
+# Winner of a game for every Game.result
+GAME_RESULTS = {None: None, 'win': HUMAN, 'lose': AI, 'draw': EMPTY}
+
+# Bytes collected before the recorder writes them to the file
+RECORD_BUFFER_BYTES = 64 * 1024
+
+# The collected records are also written once this many games or seconds have gone by,
+# so a process that is killed loses few games
+RECORD_FLUSH_GAMES = 100
+RECORD_FLUSH_SECONDS = 5.0
+
+# Appends games to a record file, the records are collected in memory and written in large blocks
+class GameRecorder:
+    def __init__(self, path, buffer_bytes=RECORD_BUFFER_BYTES, flush_games=RECORD_FLUSH_GAMES, flush_seconds=RECORD_FLUSH_SECONDS):
+        self.file = open(path, 'ab')
+        self.buffer = bytearray()
+        self.buffer_bytes = buffer_bytes
+        self.flush_games = flush_games
+        self.flush_seconds = flush_seconds
+        # Games collected since the last write and the time of the last write (a time.monotonic() value)
+        self.games = 0
+        self.flushed = time.monotonic()
+        # A new file starts with the file header
+        if self.file.tell() == 0:
+            self.buffer += RECORD_FILE_HEADER.pack(RECORD_MAGIC, RECORD_VERSION)
+
+    # Function to add a game given by the columns played, winner is HUMAN, AI, EMPTY (draw) or None (unfinished)
+    def write(self, moves, first_player=HUMAN, winner=None, geometry=DEFAULT_GEOMETRY):
+        self.buffer += RECORD_HEADER.pack(geometry.rows, geometry.cols, geometry.win, first_player, WINNER_CODES[winner], len(moves))
+        self.buffer += bytes(moves)
+        self.games += 1
+        if len(self.buffer) >= self.buffer_bytes or self.games >= self.flush_games or time.monotonic() - self.flushed >= self.flush_seconds:
+            self.flush()
+
+    # Function to add the game of a Game object
+    def write_game(self, game):
+        self.write(game.position.history, game.first_player, GAME_RESULTS[game.result], game.position.geometry)
+
+    # Function to write the collected records to the file
+    def flush(self):
+        if self.buffer:
+            self.file.write(self.buffer)
+            self.file.flush()
+            self.buffer = bytearray()
+        self.games = 0
+        self.flushed = time.monotonic()
+
+    # Function to write what is left and close the file
+    def close(self):
+        self.flush()
+        self.file.close()
+
+# Function to read the records of a record file one at a time, without loading the file
+# Every record is given as the fields of its header (rows, columns, line length, first player, winner code)
+# and the list of columns played, the fields are not checked
+def read_records(path):
+    with open(path, 'rb') as record_file:
+        header = record_file.read(RECORD_FILE_HEADER.size)
+        if not header:
+            return
+        if len(header) < RECORD_FILE_HEADER.size or RECORD_FILE_HEADER.unpack(header) != (RECORD_MAGIC, RECORD_VERSION):
+            raise ValueError('%s is not a game record file' % path)
+        while True:
+            header = record_file.read(RECORD_HEADER.size)
+            if not header:
+                return
+            if len(header) < RECORD_HEADER.size:
+                raise ValueError('%s ends in the middle of a record' % path)
+            rows, cols, win, first_player, winner, count = RECORD_HEADER.unpack(header)
+            moves = record_file.read(count)
+            if len(moves) < count:
+                raise ValueError('%s ends in the middle of a record' % path)
+            yield (rows, cols, win, first_player, winner, list(moves))
+
+# Function to turn the fields read from a file into a game, raises ValueError if they can not be one
+def decode_record(fields):
+    rows, cols, win, first_player, winner, moves = fields
+    geometry = get_geometry(rows, cols, win)
+    if first_player not in (HUMAN, AI):
+        raise ValueError('bad first player %d' % first_player)
+    if winner not in WINNERS:
+        raise ValueError('bad winner code %d' % winner)
+    return (geometry, first_player, WINNERS[winner], moves)
+
+# Function to read the games of a record file one at a time, without loading the file
+# Every game is given as (geometry, first player, winner, list of columns played), a game with a bad header
+# raises ValueError
+def read_games(path):
+    for fields in read_records(path):
+        yield decode_record(fields)
+
+# Function to replay a game, yields the position before every move and the move played in it
+# The same Position object is updated between two moves, copy it to keep a position
+def replay(record):
+    geometry, first_player, _, moves = record
+    position = Position(first_player, geometry)
+    for col in moves:
+        if not 0 <= col < geometry.cols or not position.can_play(col) or position.last_move_wins():
+            raise ValueError('move %d can not be played after %r' % (col, position.history))
+        yield (position, col)
+        position.play(col)
+
+# Transposition table of an analysis process, kept for all the games it analyses
+analysis_table = None
+
+# Function to analyse a game: the score and best move of the engine before every move
+# Returns a dictionary that is written as one line of the analysis file, scores are positive when good for the AI
+# The record is given as read by read_records. A record with a bad header or a move that can not be played
+# gets an "error" instead of its moves, so one bad record does not stop the analysis of the file
+def analyze_game(index, fields, depth, time_ms, table_size_mb=TT_SIZE_MB):
+    global analysis_table
+    if analysis_table is None:
+        analysis_table = TranspositionTable(table_size_mb)
+    rows, cols, win, first_player, _, _ = fields
+    result = {
+        'game': index,
+        'board': '%dx%dx%d' % (rows, cols, win),
+        'first_player': first_player,
+    }
+    annotations = []
+    try:
+        record = decode_record(fields)
+        result['winner'] = record[2]
+        for position, col in replay(record):
+            best_move, score, depth_reached, _ = iterative_deepening(position, time_ms, depth, analysis_table)
+            annotations.append({'ply': len(position.history), 'player': position.player, 'move': col, 'best_move': best_move, 'score': score, 'depth': depth_reached})
+    except ValueError as error:
+        result['error'] = str(error)
+        return result
+    result['moves'] = annotations
+    return result
+
+# Function to analyse every game of a record file over a process pool, yields the results in file order
+# Only a few games per worker are read ahead, so files of any size can be analysed
+def analyze(path, depth=None, time_ms=None, workers=None):
+    with ProcessPoolExecutor(workers) as executor:
+        pending = collections.deque()
+        read_ahead = 4 * (workers or os.cpu_count())
+        for index, fields in enumerate(read_records(path)):
+            pending.append(executor.submit(analyze_game, index, fields, depth, time_ms))
+            if len(pending) >= read_ahead:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+# Function to count the games of a record file by result, returns a dictionary
+# Records with a bad header are counted as invalid
+def summarize(path):
+    summary = {'games': 0, 'moves': 0, 'human_wins': 0, 'ai_wins': 0, 'draws': 0, 'unfinished': 0, 'invalid': 0}
+    names = {HUMAN: 'human_wins', AI: 'ai_wins', EMPTY: 'draws', None: 'unfinished'}
+    for fields in read_records(path):
+        summary['games'] += 1
+        summary['moves'] += len(fields[5])
+        try:
+            _, _, winner, _ = decode_record(fields)
+        except ValueError:
+            summary['invalid'] += 1
+            continue
+        summary[names[winner]] += 1
+    return summary
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Read and analyse game record files.')
+    commands = parser.add_subparsers(dest='command', required=True)
+    info_parser = commands.add_parser('info', help='count the games of a record file')
+    info_parser.add_argument('path', help='game record file')
+    analyze_parser = commands.add_parser('analyze', help='annotate every move with the score and best move of the engine')
+    analyze_parser.add_argument('path', help='game record file')
+    analyze_parser.add_argument('--depth', type=int, default=None, help='search depth for every move')
+    analyze_parser.add_argument('--time-ms', type=int, default=None, help='search time for every move')
+    analyze_parser.add_argument('--workers', type=int, default=None, help='number of worker processes (default: one per CPU core)')
+    analyze_parser.add_argument('--out', help='file the analysis is written to, one JSON object per game (default: standard output)')
+    args = parser.parse_args(argv)
+
+    if args.command == 'info':
+        print(json.dumps(summarize(args.path)))
+        return 0
+
+    if args.depth is None and args.time_ms is None:
+        parser.error('analyze needs --depth or --time-ms')
+    out = open(args.out, 'w') if args.out else sys.stdout
+    start = time.perf_counter()
+    games = errors = 0
+    try:
+        for result in analyze(args.path, args.depth, args.time_ms, args.workers):
+            out.write(json.dumps(result) + '\n')
+            games += 1
+            if 'error' in result:
+                errors += 1
+    finally:
+        if args.out:
+            out.close()
+    print('%d games analysed in %.1f s, %d with errors' % (games, time.perf_counter() - start, errors), file=sys.stderr)
+    return 1 if errors else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
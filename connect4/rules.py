@@ -0,0 +1,12 @@
+# Rules of the game: the size of the classic board and the players
+# Other board sizes and line lengths are described by connect4.geometry.Geometry
+
+# The board has 6 rows and 7 columns
+ROWS = 6
+COLS = 7
+WIN = 4     # Win the game after making line of 4 discs
+
+# Defining symbols for players
+HUMAN = 1
+AI = -1
+EMPTY = 0
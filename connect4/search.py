@@ -0,0 +1,320 @@
+# Alpha beta search of the best move
+import time
+
+from connect4.rules import HUMAN, AI
+from connect4.geometry import DEFAULT_GEOMETRY
+from connect4.position import generate_moves
+from connect4.table import TT_SIZE_MB, EXACT, LOWER, UPPER, TranspositionTable
+from connect4.ordering import MoveOrdering
+
+# Initializing alpha and beta values
+INFINITY = float('inf')
+ALPHA = -INFINITY
+BETA = INFINITY
+
+# Number of nodes searched between two checks of the clock
+NODES_PER_TIME_CHECK = 256
+
+# Score of a won game on the classic board, higher than the heuristic score of any position that is not won
+# Each empty cell left on the board adds one point, so faster wins and slower losses are preferred
+# Other boards use the win score of their geometry
+WIN_SCORE = DEFAULT_GEOMETRY.win_score
+
+# Raised inside alpha_beta when the search is cancelled or its time budget runs out
+class SearchTimeout(Exception):
+    pass
+
+# Counters of one search, collected when a SearchStats is passed in the search context
+# Without one the search only pays for a few "is None" checks
+class SearchStats:
+    def __init__(self, profiler=None):
+        # Profiler enabled only while iterative_deepening searches, e.g. cProfile.Profile()
+        # Any object with enable() and disable() methods works, so a sampling profiler can be plugged in too
+        self.profiler = profiler
+        # Positions scored at the depth limit and positions where the game is over
+        self.leaves = 0
+        self.terminals = 0
+        # Beta cutoffs by ply, counted from the root position of the search
+        self.cutoffs = []
+        # Number of discs on the board at the root position, to turn positions into plies
+        self.root_discs = 0
+        # Transposition table lookups, lookups that found the position and lookups that ended the node
+        self.table_probes = 0
+        self.table_hits = 0
+        self.table_cutoffs = 0
+        # One dictionary per completed depth of iterative deepening: depth, nodes, seconds, move and score
+        self.depths = []
+        # Nodes and seconds of the whole search
+        self.nodes = 0
+        self.seconds = 0.0
+
+    # Function to count a beta cutoff in a position
+    def cutoff(self, position):
+        ply = len(position.history) - self.root_discs
+        while len(self.cutoffs) <= ply:
+            self.cutoffs.append(0)
+        self.cutoffs[ply] += 1
+
+    # Function to get the effective branching factor: the number of moves per position that would
+    # give the nodes of the deepest completed depth in a tree without pruning
+    def branching_factor(self):
+        if not self.depths:
+            return 0.0
+        last = self.depths[-1]
+        return last['nodes'] ** (1 / last['depth'])
+
+    # Function to get the counters as a dictionary that can be written as JSON
+    def as_dict(self):
+        return {
+            'nodes': self.nodes,
+            'seconds': round(self.seconds, 6),
+            'nps': int(self.nodes / self.seconds) if self.seconds else 0,
+            'leaves': self.leaves,
+            'terminals': self.terminals,
+            'cutoffs': self.cutoffs,
+            'table_probes': self.table_probes,
+            'table_hits': self.table_hits,
+            'table_cutoffs': self.table_cutoffs,
+            'branching_factor': round(self.branching_factor(), 3),
+            'depths': self.depths,
+        }
+
+# State shared by every node of one search
+class SearchContext:
+    def __init__(self, table=None, deadline=None, ordering=None, stop=None, evaluation=None, stats=None):
+        # Transposition table, or None to search without one
+        self.table = table
+        # Function scoring the positions at the depth limit, or None to use the score kept by Position
+        self.evaluation = evaluation
+        # Move ordering, or None to search the columns from left to right
+        self.ordering = ordering
+        # Value of time.perf_counter() after which the search is stopped, or None for no limit
+        self.deadline = deadline
+        # Event (from threading or multiprocessing) that cancels the search when set, or None
+        self.stop = stop
+        # Number of nodes searched so far
+        self.nodes = 0
+        # Depth iterative deepening is searching at the moment
+        self.depth = 0
+        # Counters of the search (SearchStats), or None to not collect any
+        self.stats = stats
+
+    # Function to check if the search has to stop because it was cancelled or ran out of time
+    def should_stop(self):
+        if self.stop is not None and self.stop.is_set():
+            return True
+        return self.deadline is not None and time.perf_counter() > self.deadline
+
+# Function to get the score of a position if its game is over, or None if the game goes on
+# Only the last move can have ended the game, so only the lines through its disc are checked
+def terminal_score(position):
+    if position.last_move_wins():
+        geometry = position.geometry
+        score = geometry.win_score + geometry.cells - bin(position.mask).count('1')
+        # The player who made the last move won, positive scores are good for the AI
+        return score if position.player == HUMAN else -score
+    if position.is_full():
+        return 0
+    return None
+
+# Create a function to implement the alpha beta pruning algorithm to find the best move for the AI player
+# The position is searched in place: every move is played and taken back again, so no board is copied
+# Results are kept in the transposition table so positions reached again through other move orders are not searched twice
+def alpha_beta(position, depth, alpha, beta, player, search=None):
+    # Every node of one search shares the same search context
+    if search is None:
+        search = SearchContext()
+
+    # Count the node and stop the search if it was cancelled or the time budget is used up
+    search.nodes += 1
+    if not search.nodes % NODES_PER_TIME_CHECK and search.should_stop():
+        raise SearchTimeout()
+
+    # Check if the game is over or the depth limit is reached
+    stats = search.stats
+    score = terminal_score(position)
+    if score is not None:
+        if stats is not None:
+            stats.terminals += 1
+        # Return the score and None as the move
+        return (score, None)
+    if depth == 0:
+        if stats is not None:
+            stats.leaves += 1
+        # Score the position with the configured evaluation
+        if search.evaluation is not None:
+            return (search.evaluation(position), None)
+        return (position.score, None)
+
+    # Remember the window before the table narrows it, to know what kind of bound the result is
+    alpha_start = alpha
+    beta_start = beta
+
+    # Look the position up in the transposition table
+    tt_move = None
+    table = search.table
+    if table is not None:
+        key = position.key()
+        entry = table.probe(key)
+        if stats is not None:
+            stats.table_probes += 1
+        if entry is not None:
+            entry_depth, entry_score, bound, entry_move = entry
+            if stats is not None:
+                stats.table_hits += 1
+            # Use the stored score if it was searched at least as deep
+            if entry_depth >= depth:
+                if bound == EXACT:
+                    if stats is not None:
+                        stats.table_cutoffs += 1
+                    return (entry_score, entry_move)
+                elif bound == LOWER:
+                    alpha = max(alpha, entry_score)
+                elif bound == UPPER:
+                    beta = min(beta, entry_score)
+                if alpha >= beta:
+                    if stats is not None:
+                        stats.table_cutoffs += 1
+                    return (entry_score, entry_move)
+
+            # The stored best move is tried first
+            tt_move = entry_move
+
+    # Generate all possible moves for the player, best looking moves first
+    ordering = search.ordering
+    if ordering is not None:
+        moves = ordering.order(position, tt_move)
+    else:
+        moves = generate_moves(position)
+        if tt_move is not None:
+            moves.remove(tt_move)
+            moves.insert(0, tt_move)
+
+    # Check if the player is the AI (maximizing player)
+    if player == AI:
+        # Initialize the best score to negative infinity and the best move to None
+        best_score = -INFINITY
+        best_move = None
+        # Loop through each possible move for the AI player
+        for col in moves:
+            # Make the move, search the new position with decreased depth and switched player, then take it back
+            position.play(col)
+            score, _ = alpha_beta(position, depth - 1, alpha, beta, HUMAN, search)
+            position.undo()
+            # Check if the score is better than the best score
+            if score > best_score:
+                # Update the best score and the best move
+                best_score = score
+                best_move = col
+
+            # Update the alpha value with the maximum of alpha and best score
+            alpha = max(alpha, best_score)
+            # Check if alpha is greater than or equal to beta (pruning condition)
+            if alpha >= beta:
+                # Remember the move for ordering and break the loop as further exploration is not needed
+                if ordering is not None:
+                    ordering.cutoff(position, col, depth)
+                if stats is not None:
+                    stats.cutoff(position)
+                break
+
+    # Check if the player is the human (minimizing player)
+    elif player == HUMAN:
+        # Initialize the best score to positive infinity and the best move to None
+        best_score = INFINITY
+        best_move = None
+        # Loop through each possible move for the human player
+        for col in moves:
+            # Make the move, search the new position with decreased depth and switched player, then take it back
+            position.play(col)
+            score, _ = alpha_beta(position, depth - 1, alpha, beta, AI, search)
+            position.undo()
+            # Check if the score is better than the best score
+            if score < best_score:
+                # Update the best score and the best move
+                best_score = score
+                best_move = col
+
+            # Update the beta value with the minimum of beta and best score
+            beta = min(beta, best_score)
+            # Check if alpha is greater than or equal to beta (pruning condition)
+            if alpha >= beta:
+                # Remember the move for ordering and break the loop as further exploration is not needed
+                if ordering is not None:
+                    ordering.cutoff(position, col, depth)
+                if stats is not None:
+                    stats.cutoff(position)
+                break
+
+    # Store the result in the transposition table
+    if table is not None:
+        if best_score <= alpha_start:
+            bound = UPPER
+        elif best_score >= beta_start:
+            bound = LOWER
+        else:
+            bound = EXACT
+        table.store(key, depth, best_score, bound, best_move)
+
+    # Return the best score and the best move
+    return (best_score, best_move)
+
+# Create a function to search deeper and deeper (1, 2, 3, ...) until the time budget or depth limit is reached
+# Returns the best move and score of the last completed depth, the depth reached and the number of nodes searched
+# A search context can be passed in to watch the progress from another thread or to cancel the search
+def iterative_deepening(position, time_ms=None, max_depth=None, table=None, ordering=None, search=None):
+    if search is None:
+        search = SearchContext()
+    # The best moves of earlier depths are kept in the table and searched first by the next depth
+    if search.table is None:
+        search.table = table if table is not None else TranspositionTable(TT_SIZE_MB)
+    if search.ordering is None:
+        search.ordering = ordering if ordering is not None else MoveOrdering()
+
+    # No point in searching deeper than the number of empty cells
+    empty_cells = position.geometry.cells - bin(position.mask).count('1')
+    if max_depth is None or max_depth > empty_cells:
+        max_depth = empty_cells
+
+    start = time.perf_counter()
+    history_length = len(position.history)
+    best_move = None
+    best_score = None
+    depth_reached = 0
+
+    stats = search.stats
+    if stats is not None:
+        stats.root_discs = history_length
+        if stats.profiler is not None:
+            stats.profiler.enable()
+
+    for depth in range(1, max_depth + 1):
+        search.depth = depth
+        depth_start = time.perf_counter()
+        depth_nodes = search.nodes
+        try:
+            score, move = alpha_beta(position, depth, ALPHA, BETA, position.player, search)
+        except SearchTimeout:
+            # Take back the moves the aborted search left on the board
+            while len(position.history) > history_length:
+                position.undo()
+            break
+
+        best_move = move
+        best_score = score
+        depth_reached = depth
+        if stats is not None:
+            stats.depths.append({'depth': depth, 'nodes': search.nodes - depth_nodes, 'seconds': round(time.perf_counter() - depth_start, 6), 'move': move, 'score': score})
+
+        # The clock only starts to count once the first depth has found a move
+        if time_ms is not None:
+            search.deadline = start + time_ms / 1000
+            if time.perf_counter() >= search.deadline:
+                break
+
+    if stats is not None:
+        if stats.profiler is not None:
+            stats.profiler.disable()
+        stats.nodes = search.nodes
+        stats.seconds = time.perf_counter() - start
+    return (best_move, best_score, depth_reached, search.nodes)
@@ -0,0 +1,226 @@
+# Plays many games between two engine settings without any GUI, to compare their strength and speed
+# Usage: python -m connect4.selfplay --games 200 --engine-a depth=6 --engine-b time_ms=50,eval=none --out games.jsonl
+import argparse
+import json
+import math
+import os
+import random
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from connect4.rules import HUMAN, AI, EMPTY
+from connect4.evaluation import EVALUATIONS
+from connect4.geometry import DEFAULT_GEOMETRY, get_geometry
+from connect4.position import Position, generate_moves
+from connect4.table import TranspositionTable
+from connect4.search import SearchStats, SearchContext, iterative_deepening
+from connect4.records import GameRecorder
+
+# Settings of an engine when they are not given
+DEFAULT_ENGINE = {'depth': None, 'time_ms': None, 'eval': 'windows'}
+
+# Memory cap of the transposition table of each engine in megabytes
+SELFPLAY_TT_SIZE_MB = 4
+
+# Function to read engine settings written as "depth=6,time_ms=100,eval=windows"
+def parse_engine(text):
+    engine = dict(DEFAULT_ENGINE)
+    for item in text.split(','):
+        if not item:
+            continue
+        name, _, value = item.partition('=')
+        if name not in engine:
+            raise argparse.ArgumentTypeError('unknown engine setting %r' % name)
+        if name == 'eval':
+            if value not in EVALUATIONS:
+                raise argparse.ArgumentTypeError('unknown evaluation %r' % value)
+            engine[name] = value
+        else:
+            engine[name] = int(value)
+            if engine[name] < 1:
+                raise argparse.ArgumentTypeError('%s must be at least 1' % name)
+    if engine['depth'] is None and engine['time_ms'] is None:
+        raise argparse.ArgumentTypeError('engine needs a depth or a time_ms setting')
+    return engine
+
+# Function to read a board written as "rows x cols x win", e.g. "7x8x4"
+def parse_geometry(text):
+    try:
+        rows, cols, win = (int(number) for number in text.split('x'))
+        return get_geometry(rows, cols, win)
+    except ValueError as error:
+        raise argparse.ArgumentTypeError('bad board %r: %s' % (text, error))
+
+# Function to play random moves from the empty board, none of which ends the game
+# The opening starts over if every move of a position would end it, so the engines always get a game to play
+def random_opening(rng, plies, geometry=DEFAULT_GEOMETRY):
+    if plies >= geometry.cells:
+        raise ValueError('%d random moves fill the board' % plies)
+    position = Position(HUMAN, geometry)
+    while len(position.history) < plies:
+        moves = []
+        for col in generate_moves(position):
+            position.play(col)
+            if not position.last_move_wins() and not position.is_full():
+                moves.append(col)
+            position.undo()
+        if moves:
+            position.play(rng.choice(moves))
+        else:
+            position = Position(HUMAN, geometry)
+    return position
+
+# Function to play one game, engine A moves first in even games
+# Returns a dictionary that is written as one line of the results file, with the search counters of every
+# move when stats is True
+def play_game(index, engine_a, engine_b, random_plies, seed, stats=False, geometry=DEFAULT_GEOMETRY):
+    engines = {'A': engine_a, 'B': engine_b}
+    first, second = ('A', 'B') if index % 2 == 0 else ('B', 'A')
+    names = {HUMAN: first, AI: second}
+    tables = {'A': TranspositionTable(SELFPLAY_TT_SIZE_MB), 'B': TranspositionTable(SELFPLAY_TT_SIZE_MB)}
+    nodes = {'A': 0, 'B': 0}
+    seconds = {'A': 0.0, 'B': 0.0}
+    move_stats = []
+
+    # Start from a few random moves, otherwise every pair of games would be the same
+    rng = random.Random(seed * 1000003 + index)
+    position = random_opening(rng, random_plies, geometry)
+
+    winner = None
+    while True:
+        if position.is_winner(HUMAN):
+            winner = names[HUMAN]
+            break
+        if position.is_winner(AI):
+            winner = names[AI]
+            break
+        if position.is_full():
+            break
+
+        name = names[position.player]
+        engine = engines[name]
+        search = SearchContext(evaluation=EVALUATIONS[engine['eval']], stats=SearchStats() if stats else None)
+        start = time.perf_counter()
+        move, _, _, searched = iterative_deepening(position, engine['time_ms'], engine['depth'], tables[name], search=search)
+        seconds[name] += time.perf_counter() - start
+        nodes[name] += searched
+        if stats:
+            move_stats.append(dict(search.stats.as_dict(), ply=len(position.history), engine=name))
+        position.play(move)
+
+    result = {
+        'game': index,
+        'first': first,
+        'winner': winner,
+        'moves': list(position.history),
+        'nodes_a': nodes['A'],
+        'nodes_b': nodes['B'],
+        'seconds_a': round(seconds['A'], 6),
+        'seconds_b': round(seconds['B'], 6),
+    }
+    if stats:
+        result['stats'] = move_stats
+    return result
+
+# Function to get the mean score of engine A (win 1, draw 0.5, loss 0) and its 95% confidence interval
+def score_interval(wins, draws, losses):
+    games = wins + draws + losses
+    if games == 0:
+        return (0.0, 0.0, 0.0)
+    mean = (wins + 0.5 * draws) / games
+    variance = (wins * (1 - mean) ** 2 + draws * (0.5 - mean) ** 2 + losses * mean ** 2) / games
+    margin = 1.96 * math.sqrt(variance / games)
+    return (mean, max(0.0, mean - margin), min(1.0, mean + margin))
+
+# Function to play all games over a process pool, writing each result as soon as its game ends
+# The games are also added to a game record file if a recorder (connect4.records.GameRecorder) is given
+# Returns the summary statistics as a dictionary
+def run(games, engine_a, engine_b, workers=None, random_plies=2, seed=0, out=None, stats=False, geometry=DEFAULT_GEOMETRY, recorder=None):
+    wins = draws = losses = 0
+    nodes = {'a': 0, 'b': 0}
+    seconds = {'a': 0.0, 'b': 0.0}
+    start = time.perf_counter()
+
+    with ProcessPoolExecutor(workers) as executor:
+        futures = [executor.submit(play_game, index, engine_a, engine_b, random_plies, seed, stats, geometry) for index in range(games)]
+        for future in as_completed(futures):
+            result = future.result()
+            if out is not None:
+                out.write(json.dumps(result) + '\n')
+                out.flush()
+            if recorder is not None:
+                # The first engine plays the HUMAN discs
+                winner = EMPTY if result['winner'] is None else HUMAN if result['winner'] == result['first'] else AI
+                recorder.write(result['moves'], HUMAN, winner, geometry)
+
+            if result['winner'] == 'A':
+                wins += 1
+            elif result['winner'] == 'B':
+                losses += 1
+            else:
+                draws += 1
+            for engine in ('a', 'b'):
+                nodes[engine] += result['nodes_' + engine]
+                seconds[engine] += result['seconds_' + engine]
+
+    elapsed = time.perf_counter() - start
+    score, score_low, score_high = score_interval(wins, draws, losses)
+    return {
+        'games': games,
+        'wins': wins,
+        'draws': draws,
+        'losses': losses,
+        'score': score,
+        'score_low': score_low,
+        'score_high': score_high,
+        'seconds': elapsed,
+        'games_per_second': games / elapsed if elapsed else 0.0,
+        'nps_a': nodes['a'] / seconds['a'] if seconds['a'] else 0.0,
+        'nps_b': nodes['b'] / seconds['b'] if seconds['b'] else 0.0,
+    }
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Play games between two engine settings and report strength and speed.')
+    parser.add_argument('--games', type=int, default=100, help='number of games to play')
+    parser.add_argument('--engine-a', type=parse_engine, default=parse_engine('depth=4'), help='settings of engine A, e.g. depth=6,time_ms=100,eval=windows')
+    parser.add_argument('--engine-b', type=parse_engine, default=parse_engine('depth=4'), help='settings of engine B')
+    parser.add_argument('--board', type=parse_geometry, default=DEFAULT_GEOMETRY, help='rows, columns and line length, e.g. 7x8x4 (default: 6x7x4)')
+    parser.add_argument('--workers', type=int, default=None, help='number of worker processes (default: one per CPU core)')
+    parser.add_argument('--random-plies', type=int, default=2, help='random moves at the start of every game')
+    parser.add_argument('--seed', type=int, default=0, help='seed of the random opening moves')
+    parser.add_argument('--out', help='file the results of the games are appended to, one JSON object per line')
+    parser.add_argument('--record', help='game record file the games are appended to (see connect4.records)')
+    parser.add_argument('--stats', action='store_true', help='add the search counters of every move to the results file')
+    parser.add_argument('--min-score', type=float, help='fail if engine A scores significantly below this (0 to 1)')
+    parser.add_argument('--min-nps', type=float, help='fail if engine A searches fewer nodes per second than this')
+    args = parser.parse_args(argv)
+    if not 0 <= args.random_plies < args.board.cells:
+        parser.error('--random-plies must be at least 0 and below the %d cells of the board' % args.board.cells)
+
+    out = open(args.out, 'a') if args.out else None
+    recorder = GameRecorder(args.record) if args.record else None
+    try:
+        summary = run(args.games, args.engine_a, args.engine_b, args.workers, args.random_plies, args.seed, out, args.stats, args.board, recorder)
+    finally:
+        if out is not None:
+            out.close()
+        if recorder is not None:
+            recorder.close()
+
+    print('games %d in %.1f s (%.2f games/s, %d workers)' % (summary['games'], summary['seconds'], summary['games_per_second'], args.workers or os.cpu_count()))
+    print('engine A: +%d =%d -%d, score %.3f (95%% CI %.3f to %.3f)' % (summary['wins'], summary['draws'], summary['losses'], summary['score'], summary['score_low'], summary['score_high']))
+    print('nodes/s: engine A %d, engine B %d' % (summary['nps_a'], summary['nps_b']))
+
+    # Regression gates
+    failed = False
+    if args.min_score is not None and summary['score_high'] < args.min_score:
+        print('FAIL: engine A scores below %.3f' % args.min_score)
+        failed = True
+    if args.min_nps is not None and summary['nps_a'] < args.min_nps:
+        print('FAIL: engine A searches fewer than %d nodes/s' % args.min_nps)
+        failed = True
+    return 1 if failed else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
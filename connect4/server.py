@@ -0,0 +1,279 @@
+# Game server: hosts many games at once over TCP, one JSON object per line in both directions
+# Usage: python -m connect4.server --port 8765 --workers 4
+#
+# Requests (an "id" field is copied into the reply so clients can match them):
+#   {"op": "new", "first": "human" or "ai", "time_ms": 100}   start a game, the AI moves right away if it goes first
+#   {"op": "play", "game": 1, "col": 3}                        play a column (0 to 6), the AI answers with its move
+#   {"op": "close", "game": 1}                                 end a game
+#   {"op": "stats"}                                            number of games and AI move latencies
+# Replies carry the game state ("game", "moves", "state", "result", and "ai_move" after an AI move)
+# or {"error": "..."} if the request could not be done.
+# Games belong to the connection that started them and end when it closes.
+# With --record every finished game is appended to a game record file (see connect4.records).
+import argparse
+import asyncio
+import collections
+import json
+import os
+import signal
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from connect4.rules import HUMAN, AI
+from connect4.game import Game
+from connect4.table import TranspositionTable
+from connect4.search import iterative_deepening
+from connect4.records import GameRecorder
+
+# Time budget of an AI move when the request does not give one, and the largest budget a request can ask for
+DEFAULT_TIME_MS = 100
+MAX_TIME_MS = 5000
+
+# AI moves waiting for a worker or being searched, per worker process
+# Requests beyond that wait for a free slot, and fail with "busy" if none frees up within their time budget
+QUEUE_PER_WORKER = 4
+
+# Memory cap of the transposition table of each worker process in megabytes
+SERVER_TT_SIZE_MB = 64
+
+# Number of recent AI move latencies kept for the percentiles
+LATENCY_SAMPLES = 10000
+
+# Transposition table of a worker process, shared by the searches of every game it is given
+# Keys are whole positions, so an entry is right for every game that reaches that position
+worker_table = None
+
+# Function run by a worker process: searches a position until the deadline (a time.time() value)
+# The time spent waiting for the worker counts against the budget, returns (best move, score, depth, nodes)
+def search_move(position, deadline):
+    global worker_table
+    if worker_table is None:
+        worker_table = TranspositionTable(SERVER_TT_SIZE_MB)
+    time_ms = max(0, (deadline - time.time()) * 1000)
+    return iterative_deepening(position, time_ms, None, worker_table)
+
+# Function to get a percentile (0 to 100) of a list of numbers, or None if it is empty
+def percentile(values, percent):
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * percent / 100))]
+
+# A game hosted by the server and the time budget of its AI moves
+class Session:
+    def __init__(self, number, game, time_ms):
+        self.number = number
+        self.game = game
+        self.time_ms = time_ms
+
+class GameServer:
+    def __init__(self, workers=None, book=None, recorder=None):
+        self.workers = workers or os.cpu_count()
+        self.executor = ProcessPoolExecutor(self.workers)
+        # Limits the AI moves in flight, so a burst of requests queues here instead of in the process pool
+        self.slots = asyncio.Semaphore(self.workers * QUEUE_PER_WORKER)
+        # Opening book (connect4.book.OpeningBook) shared by every game, or None
+        self.book = book
+        # Recorder (connect4.records.GameRecorder) the finished games are written to, or None
+        self.recorder = recorder
+        self.next_session = 1
+        self.sessions = 0
+        # Latencies of recent AI moves in seconds, from the request arriving to the reply being ready
+        self.latencies = collections.deque(maxlen=LATENCY_SAMPLES)
+        # Number of requests that failed because no worker was free within their time budget
+        self.busy = 0
+
+    # Function to serve one connection until the client closes it
+    async def handle_connection(self, reader, writer):
+        # Games of this connection, by game number
+        sessions = {}
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                # Requests of a connection are answered in order, a client that sends faster than the AI
+                # answers is slowed down by TCP once the replies it does not read fill the buffers
+                reply = await self.handle_request(line, sessions)
+                writer.write((json.dumps(reply) + '\n').encode())
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            self.sessions -= len(sessions)
+            writer.close()
+
+    # Function to answer one request line, returns the reply as a dictionary
+    async def handle_request(self, line, sessions):
+        start = time.perf_counter()
+        request = {}
+        try:
+            request = json.loads(line)
+            if not isinstance(request, dict):
+                raise ValueError('a request must be a JSON object')
+            op = request.get('op')
+            if op == 'new':
+                reply = await self.new_game(request, sessions)
+            elif op == 'play':
+                reply = await self.play(request, sessions)
+            elif op == 'close':
+                if sessions.pop(request.get('game'), None) is not None:
+                    self.sessions -= 1
+                reply = {'game': request.get('game'), 'state': 'closed'}
+            elif op == 'stats':
+                reply = self.stats()
+            else:
+                raise ValueError('unknown op %r' % (op,))
+        except (ValueError, KeyError, TypeError, OverflowError) as error:
+            reply = {'error': str(error)}
+        except Exception as error:
+            # Anything else is a bug of the server, it fails this request but not the games of the connection
+            reply = {'error': 'internal error: %r' % (error,)}
+        if 'ai_move' in reply:
+            self.latencies.append(time.perf_counter() - start)
+        if isinstance(request, dict) and 'id' in request:
+            reply['id'] = request['id']
+        return reply
+
+    # Function to start a game for a connection
+    async def new_game(self, request, sessions):
+        first = request.get('first', 'human')
+        if first not in ('human', 'ai'):
+            raise ValueError('first must be "human" or "ai"')
+        time_ms = min(int(request.get('time_ms', DEFAULT_TIME_MS)), MAX_TIME_MS)
+        if time_ms <= 0:
+            raise ValueError('time_ms must be positive')
+        session = Session(self.next_session, Game(HUMAN if first == 'human' else AI, book=self.book), time_ms)
+        self.next_session += 1
+        if first == 'ai':
+            reply = await self.ai_move(session)
+            # Nothing was started if no worker was free
+            if 'error' in reply:
+                return {'error': reply['error']}
+        else:
+            reply = self.game_reply(session)
+        sessions[session.number] = session
+        self.sessions += 1
+        return reply
+
+    # Function to play the move of the human, and the answer of the AI if the game goes on
+    async def play(self, request, sessions):
+        session = sessions.get(request.get('game'))
+        if session is None:
+            raise ValueError('no game %r on this connection' % (request.get('game'),))
+        game = session.game
+        game.play(request['col'])
+        if game.state == 'over':
+            self.record(session)
+            return self.game_reply(session)
+        reply = await self.ai_move(session)
+        # Take the move back if no worker was free, so the same request can be sent again
+        if 'error' in reply:
+            game.position.undo()
+            reply = dict(self.game_reply(session), error=reply['error'])
+        return reply
+
+    # Function to let the AI move in a game, the search runs in a worker process
+    # Returns the reply with the AI move, or an error if no worker was free within the time budget
+    async def ai_move(self, session):
+        game = session.game
+        entry = game.book_move()
+        if entry is not None:
+            move = entry[0]
+        else:
+            deadline = time.time() + session.time_ms / 1000
+            try:
+                await asyncio.wait_for(self.slots.acquire(), session.time_ms / 1000)
+            except asyncio.TimeoutError:
+                self.busy += 1
+                return {'error': 'busy'}
+            try:
+                loop = asyncio.get_running_loop()
+                move, _, _, _ = await loop.run_in_executor(self.executor, search_move, game.position, deadline)
+            finally:
+                self.slots.release()
+        game.play(move)
+        if game.state == 'over':
+            self.record(session)
+        return dict(self.game_reply(session), ai_move=move)
+
+    # Function to record a finished game
+    def record(self, session):
+        if self.recorder is not None:
+            self.recorder.write_game(session.game)
+
+    # Function to describe the state of a game for a reply
+    def game_reply(self, session):
+        return {
+            'game': session.number,
+            'moves': session.game.position.history,
+            'state': session.game.state,
+            'result': session.game.result,
+        }
+
+    # Function to get the server statistics, latencies in milliseconds
+    def stats(self):
+        latencies = list(self.latencies)
+        return {
+            'games': self.sessions,
+            'workers': self.workers,
+            'ai_moves': len(latencies),
+            'busy': self.busy,
+            'p50_ms': None if not latencies else round(percentile(latencies, 50) * 1000, 3),
+            'p99_ms': None if not latencies else round(percentile(latencies, 99) * 1000, 3),
+        }
+
+    # Function to write the recorded games every few seconds, so they are on disk even when no game ends for a while
+    async def flush_records(self):
+        while True:
+            await asyncio.sleep(self.recorder.flush_seconds)
+            self.recorder.flush()
+
+    # Function to stop the worker processes and write the recorded games
+    def close(self):
+        self.executor.shutdown(cancel_futures=True)
+        if self.recorder is not None:
+            self.recorder.close()
+
+async def serve(host, port, workers, book, recorder):
+    game_server = GameServer(workers, book, recorder)
+    server = await asyncio.start_server(game_server.handle_connection, host, port)
+    print('serving on %s:%d with %d workers' % (host, port, game_server.workers), flush=True)
+    # SIGTERM stops the server like Ctrl+C does, so the recorded games are written (not available on Windows)
+    stopped = asyncio.Event()
+    try:
+        asyncio.get_running_loop().add_signal_handler(signal.SIGTERM, stopped.set)
+    except NotImplementedError:
+        pass
+    flusher = asyncio.create_task(game_server.flush_records()) if recorder is not None else None
+    try:
+        await stopped.wait()
+    finally:
+        if flusher is not None:
+            flusher.cancel()
+        server.close()
+        game_server.close()
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Host many games against the AI over TCP (JSON lines).')
+    parser.add_argument('--host', default='127.0.0.1', help='address to listen on')
+    parser.add_argument('--port', type=int, default=8765, help='port to listen on')
+    parser.add_argument('--workers', type=int, default=None, help='number of worker processes (default: one per CPU core)')
+    parser.add_argument('--book', help='opening book file looked up before searching')
+    parser.add_argument('--record', help='game record file the finished games are appended to')
+    args = parser.parse_args(argv)
+
+    book = None
+    if args.book:
+        from connect4.book import OpeningBook
+        book = OpeningBook(args.book)
+    try:
+        recorder = GameRecorder(args.record) if args.record else None
+        asyncio.run(serve(args.host, args.port, args.workers, book, recorder))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
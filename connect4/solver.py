@@ -0,0 +1,201 @@
+# Solver: exact game-theoretic score of a position with perfect play from both sides
+# Usage: python -m connect4.solver 4444455533212235    (columns played from the empty board, starting at 1)
+# Early positions take very long to solve, the solver is meant for the middle and the end of the game
+#
+# Scores are seen from the player to move:
+#   positive: the player to move wins, the sooner the higher (1 = wins with their last possible disc)
+#   zero: draw
+#   negative: the player to move loses, the later the closer to zero
+import sys
+import time
+
+from connect4.rules import COLS, HUMAN
+from connect4.position import Position
+from connect4.table import TT_SIZE_MB, EXACT, LOWER, UPPER, TranspositionTable
+
+# Function to count the set bits of an integer
+def count_bits(bits):
+    return bin(bits).count('1')
+
+# Solves positions with a negamax search that only asks yes/no questions (null windows)
+class Solver:
+    def __init__(self, table_size_mb=TT_SIZE_MB):
+        self.table = TranspositionTable(table_size_mb)
+        # Number of positions searched since the solver was created
+        self.nodes = 0
+
+    # Function to get the exact score of a position
+    def solve(self, position):
+        cells = position.geometry.cells
+        moves = count_bits(position.mask)
+        # Check if the player to move can win right away
+        if position.winning_cells(position.player) & position.playable_cells():
+            return (cells + 1 - moves) // 2
+
+        # Narrow the range of possible scores with null window searches until it is a single score
+        low = -((cells - moves) // 2)
+        high = (cells + 1 - moves) // 2
+        while low < high:
+            middle = low + (high - low) // 2
+            # Ask about scores near zero first, they are the most likely ones
+            if middle <= 0 and low // 2 < middle:
+                middle = low // 2
+            elif middle >= 0 and high // 2 > middle:
+                middle = high // 2
+            # Is the score above middle?
+            score = self.negamax(position, middle, middle + 1)
+            if score <= middle:
+                high = score
+            else:
+                low = score
+        return low
+
+    # Function to search a position that can not be won in one move, with the score known to be inside (alpha, beta)
+    def negamax(self, position, alpha, beta):
+        self.nodes += 1
+        geometry = position.geometry
+        cells = geometry.cells
+        moves = count_bits(position.mask)
+        player = position.player
+
+        # Moves that do not lose right away: blocks if the opponent threatens to win, and never below a threat
+        possible = position.playable_cells()
+        opponent_wins = position.winning_cells(-player)
+        forced = possible & opponent_wins
+        if forced:
+            # Two threats can not both be blocked
+            if forced & (forced - 1):
+                return -((cells - moves) // 2)
+            possible = forced
+        non_losing = possible & ~(opponent_wins >> 1)
+        if not non_losing:
+            return -((cells - moves) // 2)
+
+        # A draw if the board will be full after the next two moves
+        if moves >= cells - 2:
+            return 0
+
+        # The opponent can not win with their next move, so the score is at least this
+        low = -((cells - 2 - moves) // 2)
+        if alpha < low:
+            alpha = low
+            if alpha >= beta:
+                return alpha
+        # The player can not win with this move, so the score is at most this
+        high = (cells - 1 - moves) // 2
+        if beta > high:
+            beta = high
+            if alpha >= beta:
+                return beta
+
+        # Mirror images share their entry in the table
+        key, mirrored = position.canonical_key()
+        entry = self.table.probe(key)
+        if entry is not None:
+            _, entry_score, bound, _ = entry
+            if bound == EXACT:
+                return entry_score
+            elif bound == LOWER:
+                if entry_score > alpha:
+                    alpha = entry_score
+            elif entry_score < beta:
+                beta = entry_score
+            if alpha >= beta:
+                return entry_score
+        alpha_start = alpha
+
+        # Search the moves that leave the player the most ways to win first, center columns first on ties
+        ordered = []
+        for col in geometry.center_order:
+            if non_losing & geometry.column_masks[col]:
+                position.play(col)
+                ordered.append((count_bits(position.winning_cells(player)), col))
+                position.undo()
+        ordered.sort(key=lambda item: item[0], reverse=True)
+
+        best_move = None
+        for _, col in ordered:
+            position.play(col)
+            score = -self.negamax(position, -beta, -alpha)
+            position.undo()
+            if score >= beta:
+                self.table.store(key, 0, score, LOWER, geometry.cols - 1 - col if mirrored else col)
+                return score
+            if score > alpha:
+                alpha = score
+                best_move = col
+
+        if alpha > alpha_start:
+            self.table.store(key, 0, alpha, EXACT, geometry.cols - 1 - best_move if mirrored else best_move)
+        else:
+            self.table.store(key, 0, alpha, UPPER, None)
+        return alpha
+
+    # Function to find a move that keeps the exact score of the position, returns (move, score)
+    def best_move(self, position):
+        cells = position.geometry.cells
+        best = None
+        for col in position.geometry.center_order:
+            if not position.can_play(col):
+                continue
+            position.play(col)
+            if position.is_winner(-position.player):
+                score = (cells + 2 - count_bits(position.mask)) // 2
+            else:
+                score = -self.solve(position)
+            position.undo()
+            if best is None or score > best[1]:
+                best = (col, score)
+        return best
+
+# Function to describe a score: ('win', 'draw' or 'loss' for the player to move, plies until the game ends)
+# The number of plies is None for a draw, the game may end earlier if the losing player makes a mistake
+def describe(score, position):
+    if score == 0:
+        return ('draw', None)
+    cells = position.geometry.cells
+    moves = count_bits(position.mask)
+    # A win with the n-th disc of the game scores (cells + 2 - n) // 2, so n is one of two numbers
+    last_disc = cells + 2 - 2 * abs(score)
+    # The winning disc is dropped by the player to move if they win, by the opponent if they lose
+    if (last_disc - moves) % 2 != (1 if score > 0 else 0):
+        last_disc -= 1
+    return ('win' if score > 0 else 'loss', last_disc - moves)
+
+# Function to solve a position given as columns played from the empty board, starting at 1 (the usual notation)
+# Raises ValueError if the moves can not be played or the game is already over after them
+def solve_moves(text, solver=None):
+    position = Position(HUMAN)
+    for char in text:
+        if not '1' <= char <= str(COLS):
+            raise ValueError('%r is not a column from 1 to %d' % (char, COLS))
+        col = int(char) - 1
+        if position.last_move_wins():
+            raise ValueError('the game is over before move %d' % (len(position.history) + 1))
+        if not position.can_play(col):
+            raise ValueError('column %s is full at move %d' % (char, len(position.history) + 1))
+        position.play(col)
+    if position.last_move_wins() or position.is_full():
+        raise ValueError('the game is already over')
+    if solver is None:
+        solver = Solver()
+    return solver.solve(position), position
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    if len(argv) != 1:
+        print('usage: python -m connect4.solver MOVES   (columns 1-%d played from the empty board)' % COLS)
+        return 2
+    solver = Solver()
+    start = time.perf_counter()
+    try:
+        score, position = solve_moves(argv[0], solver)
+    except ValueError as error:
+        print('bad moves %s: %s' % (argv[0], error))
+        return 2
+    outcome, plies = describe(score, position)
+    print('score %d: %s%s (%d nodes, %.3f s)' % (score, outcome, '' if plies is None else ' in %d plies' % plies, solver.nodes, time.perf_counter() - start))
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,167 @@
+# Transposition table for the search
+from array import array
+
+# Memory cap of the transposition table in megabytes
+TT_SIZE_MB = 16
+
+# Bound types stored in the transposition table
+EXACT = 0   # The score is the exact value of the position
+LOWER = 1   # The search failed high, the real value is at least the score
+UPPER = 2   # The search failed low, the real value is at most the score
+
+# Bytes used by one table entry: key (8), score (4), depth (1), bound (1) and best move (1)
+TT_ENTRY_BYTES = 15
+
+# Keys of boards larger than the classic one can need more than 63 bits. The table then keeps the low 63 bits
+# of every key and a 64 bit check made from the rest, so an entry takes 8 more bytes
+KEY_LOW_BITS = 63
+KEY_LOW_MASK = (1 << KEY_LOW_BITS) - 1
+CHECK_MASK = (1 << 64) - 1
+TT_WIDE_ENTRY_BYTES = TT_ENTRY_BYTES + 8
+
+# Function to split a key into its low 63 bits and a 64 bit check folded from the higher bits
+# Keys of up to 127 bits are kept exactly
+def split_key(key):
+    high = key >> KEY_LOW_BITS
+    check = 0
+    while high:
+        check ^= high & CHECK_MASK
+        high >>= 64
+    return (key & KEY_LOW_MASK, check)
+
+# Function to find the largest prime number not above n (n >= 2)
+def previous_prime(n):
+    while True:
+        divisor = 2
+        while divisor * divisor <= n and n % divisor:
+            divisor += 1
+        if divisor * divisor > n:
+            return n
+        n -= 1
+
+# Transposition table storing search results of positions reached through different move orders
+# Every bucket has two slots: the first one keeps the deepest search, the second one is always replaced
+class TranspositionTable:
+    def __init__(self, size_mb=TT_SIZE_MB):
+        self.size_mb = size_mb
+        self.allocate(TT_ENTRY_BYTES)
+        # Counters for sizing the table
+        self.hits = 0
+        self.misses = 0
+        self.collisions = 0
+        self.stores = 0
+        self.used = 0
+
+    # Function to make empty entry arrays for entries of a number of bytes
+    def allocate(self, entry_bytes):
+        self.entry_bytes = entry_bytes
+        # Number of buckets that fit in the memory cap, a prime count spreads the keys evenly
+        self.buckets = previous_prime(max(2, self.size_mb * 1024 * 1024 // (2 * entry_bytes)))
+        slots = 2 * self.buckets
+        # Entries are kept in flat arrays so the table never grows past its cap
+        self.keys = array('q', [-1]) * slots
+        self.scores = array('i', [0]) * slots
+        self.depths = array('b', [0]) * slots
+        self.bounds = array('b', [0]) * slots
+        self.moves = array('b', [-1]) * slots
+        # Checks of the keys longer than 63 bits, None until the table sees such a key
+        self.checks = None if entry_bytes == TT_ENTRY_BYTES else array('Q', [0]) * slots
+
+    # Function to look a position up, returns (depth, score, bound, best move) or None
+    def probe(self, key):
+        if self.checks is not None:
+            return self.probe_wide(key)
+        slot = (key % self.buckets) * 2
+        for i in (slot, slot + 1):
+            if self.keys[i] == key:
+                self.hits += 1
+                move = self.moves[i]
+                return (self.depths[i], self.scores[i], self.bounds[i], None if move < 0 else move)
+
+        # Count a collision if the bucket is taken by other positions
+        if self.keys[slot] >= 0 or self.keys[slot + 1] >= 0:
+            self.collisions += 1
+        self.misses += 1
+        return None
+
+    # Function to look a position up in a table of wide entries
+    def probe_wide(self, key):
+        slot = (key % self.buckets) * 2
+        low, check = split_key(key)
+        for i in (slot, slot + 1):
+            if self.keys[i] == low and self.checks[i] == check:
+                self.hits += 1
+                move = self.moves[i]
+                return (self.depths[i], self.scores[i], self.bounds[i], None if move < 0 else move)
+
+        if self.keys[slot] >= 0 or self.keys[slot + 1] >= 0:
+            self.collisions += 1
+        self.misses += 1
+        return None
+
+    # Function to store the result of a search
+    def store(self, key, depth, score, bound, move):
+        if self.checks is not None or key > KEY_LOW_MASK:
+            return self.store_wide(key, depth, score, bound, move)
+        slot = (key % self.buckets) * 2
+        if self.keys[slot + 1] == key:
+            # The position is already in the always-replace slot
+            slot += 1
+        elif self.keys[slot] != key and depth < self.depths[slot]:
+            # Keep the deeper search in the first slot and use the always-replace slot
+            slot += 1
+
+        if self.keys[slot] < 0:
+            self.used += 1
+        self.keys[slot] = key
+        self.scores[slot] = score
+        self.depths[slot] = depth
+        self.bounds[slot] = bound
+        self.moves[slot] = -1 if move is None else move
+        self.stores += 1
+
+    # Function to store the result of a search in a table of wide entries
+    def store_wide(self, key, depth, score, bound, move):
+        if self.checks is None:
+            # The first key longer than 63 bits: start over with wide entries, fewer of them fit in the memory cap
+            self.allocate(TT_WIDE_ENTRY_BYTES)
+            self.used = 0
+        slot = (key % self.buckets) * 2
+        low, check = split_key(key)
+        if self.keys[slot + 1] == low and self.checks[slot + 1] == check:
+            slot += 1
+        elif (self.keys[slot] != low or self.checks[slot] != check) and depth < self.depths[slot]:
+            slot += 1
+
+        if self.keys[slot] < 0:
+            self.used += 1
+        self.keys[slot] = low
+        self.checks[slot] = check
+        self.scores[slot] = score
+        self.depths[slot] = depth
+        self.bounds[slot] = bound
+        self.moves[slot] = -1 if move is None else move
+        self.stores += 1
+
+    # Function to empty the table and reset the counters
+    def clear(self):
+        slots = 2 * self.buckets
+        self.keys = array('q', [-1]) * slots
+        self.depths = array('b', [0]) * slots
+        if self.checks is not None:
+            self.checks = array('Q', [0]) * slots
+        self.hits = self.misses = self.collisions = self.stores = self.used = 0
+
+    # Function to get the table counters as a dictionary
+    def stats(self):
+        probes = self.hits + self.misses
+        return {
+            'size_bytes': 2 * self.buckets * self.entry_bytes,
+            'slots': 2 * self.buckets,
+            'used': self.used,
+            'stores': self.stores,
+            'hits': self.hits,
+            'misses': self.misses,
+            'collisions': self.collisions,
+            'hit_rate': self.hits / probes if probes else 0.0,
+        }
@@ -1,6 +1,15 @@
 # Importing libraries
 import pygame # For GUI
+import os
 import sys
+import time
+import threading # For cancelling the AI search
+from concurrent.futures import ThreadPoolExecutor # For running the AI search in the background
+
+from connect4 import HUMAN, AI, EMPTY, Game, SearchContext, get_geometry
+from connect4.parallel import ParallelSearch
+from connect4.book import OpeningBook
+from connect4.records import GameRecorder
 
 # Defining colours in RGB format
 
@@ -10,475 +19,324 @@ RED = (255, 0, 0)       # For Human move
 BLUE = (0, 0, 255)      # For Background grid
 YELLOW = (255, 240, 0)  # For AI move
 
-# The board had 6 rows and 7 colums
-ROWS = 6
-COLS = 7
-WIN = 4     # Win the game after making line of 4 discs
-
-# Defining window dimensions
-WINDOW_WIDTH = 605
-WINDOW_HEIGHT = 520
-MARGIN = 10
+# Board of the game: rows, columns and the length of a winning line (6, 7, 4 is the classic game)
+# Variants such as get_geometry(7, 8, 4) or get_geometry(6, 7, 5) work the same way
+GEOMETRY = get_geometry(6, 7, 4)
+ROWS = GEOMETRY.rows
+COLS = GEOMETRY.cols
 
 # Defining size of disc and gap between each disk
 DISC_SIZE = 80
 DISC_GAP = 5
 
 # Defining the board dimensions for GUI
+MARGIN = 10
 BOARD_WIDTH = COLS * (DISC_SIZE + DISC_GAP) + MARGIN
 BOARD_HEIGHT = ROWS * (DISC_SIZE + DISC_GAP) + MARGIN
 
-# Defining symbols for players
-HUMAN = 1
-AI = -1
-EMPTY = 0
-
-# Initializing alpha and beta values
-INFINITY = float('inf')
-ALPHA = -INFINITY
-BETA = INFINITY
-
-# Creating window
-pygame.init()
-window = pygame.display.set_mode((WINDOW_WIDTH, WINDOW_HEIGHT))
-pygame.display.set_caption('Connect Four')
-clock = pygame.time.Clock()
-
-# Setting font style
-font = pygame.font.SysFont('Arial', 60)
-
-# Creating and initializing game board with zeros
-board = []
-for i in range(ROWS):
-    row = []
-    for j in range(COLS):
-        row.append(EMPTY)
-    board.append(row)
-
-
-# Variable to store the current player
-current_player = HUMAN
-
-# Variable to store the game state (running or over)
-game_state = 'running'
-
-# Variable to store the game result (win, lose, draw or None)
-game_result = None
-
-# Function to draw the board on the window
-def draw_board():
-    # Fills the window with grey color
-    window.fill(GREY)
-
-    # Draws a blue rectangle for the board background
-    pygame.draw.rect(window, BLUE, (0, 0, BOARD_WIDTH, BOARD_HEIGHT))
-
-    # Loop for drawing colored discs on the board
-    for row in range(ROWS):
-        for col in range(COLS):
-            # Calculate the position and radius of each disc slot
-            x = MARGIN + col * (DISC_SIZE + DISC_GAP) + DISC_SIZE // 2
-            y = MARGIN + row * (DISC_SIZE + DISC_GAP) + DISC_SIZE // 2
-            r = DISC_SIZE // 2 - DISC_GAP // 2
-
-            # Check the value of the board at the current row and column
-            if board[row][col] == HUMAN:
-                # Draws a red circle for the human disc
-                pygame.draw.circle(window, RED, (x, y), r)
-            elif board[row][col] == AI:
-                # Draws a yellow circle for the AI disc
-                pygame.draw.circle(window, YELLOW, (x, y), r)
-            else:
-                # Draws a grey circle for each disc slot
-                pygame.draw.circle(window, GREY, (x, y), r)
-
-    # Check the game state and result
-    if game_state == 'over':
-        # For displaying the game result
-        if game_result == 'win':
-            text = font.render('You win!', True, BLACK)
-        elif game_result == 'lose':
-            text = font.render('You lose!', True, BLACK)
-        elif game_result == 'draw':
-            text = font.render('Draw!', True, BLACK)
-
-        # Draws the text rectangle and centers it on the window
-        text_rect = text.get_rect()
-        text_rect.center = (WINDOW_WIDTH // 2, WINDOW_HEIGHT // 2)
-        window.blit(text, text_rect)
-
-# Function to check if the board is full
-def is_full():
-    for col in range(COLS):
-        if board[0][col] == EMPTY:
-            # Return False if there is an empty slot
-            return False
-    # Return True if there are no empty slots
-    return True
-
-# Function to check if there is a winners
-def is_winner(player):
-    for row in range(ROWS):
-        for col in range(COLS):
-            # Checks if the current slot belongs to the player
-            if board[row][col] == player:
-                # Check horizontal line
-                if col + WIN <= COLS:
-                    # Counter to keep track of horizontal discs
-                    h_count = 0
-                    # Loop through each horizontal slot
-                    for i in range(WIN):
-                        # Check if the next slot belongs to the player and increment it
-                        if board[row][col + i] == player:
-                            h_count += 1
-
-                    # Check if the counter is equal to the number of discs required to win
-                    if h_count == WIN:
-                        return True
-
-                # Checks vertical line
-                if row + WIN <= ROWS:
-                    # Counter to keep track of vertical discs
-                    v_count = 0
-                    # Loop through each vertical slot
-                    for i in range(WIN):
-                        # Check if the next slot belongs to the player and increment it
-                        if board[row + i][col] == player:
-                            v_count += 1
-
-                    # Check if the counter is equal to the number of discs required to win
-                    if v_count == WIN:
-                        return True
-
-                # Check diagonal win (positive slope)
-                if row + WIN <= ROWS and col + WIN <= COLS:
-                    # Initialize a counter for diagonal discs
-                    d_count = 0
-                    # Loop through each diagonal slot
-                    for i in range(WIN):
-                        # Check if the slot belongs to the player and increment
-                        if board[row + i][col + i] == player:
-                            d_count += 1
-
-                    # Check if the counter is equal to the number of discs required to win
-                    if d_count == WIN:
-                        return True
-
-                # Check diagonal win (negative slope)
-                if row - WIN >= -1 and col + WIN <= COLS:
-                    # Initialize a counter for diagonal discs
-                    d_count = 0
-                    # Loop through each diagonal slot
-                    for i in range(WIN):
-                        # Check if the slot belongs to the player and increment
-                        if board[row - i][col + i] == player:
-                            d_count += 1
-
-                    # Check if the counter is equal to the number of discs required to win
-                    if d_count == WIN:
-                        # Return True if there is a diagonal win (negative slope)
-                        return True
-
-    # Return False if there is no winner
-    return False
-
-# Function to generate all possible moves for a given board state and player
-def generate_moves(board, player):
-    # Initialize an empty list to store the moves
-    moves = []
-    # Loop through each column of the board
-    for col in range(COLS):
-        # Check if the top row of the column is empty
-        if board[0][col] == EMPTY:
-            # Loop through each row of the column from bottom to top
-            for row in reversed(range(ROWS)):
-                # Check if the current slot is empty
-                if board[row][col] == EMPTY:
-                    # Create a copy of the board
-                    new_board = [row[:] for row in board]
-                    # Drop the player's disc into the empty slot
-                    new_board[row][col] = player
-                    # Append the move to the list of moves
-                    moves.append((col, new_board))
-                    # Break the loop as only one disc can be dropped per column
-                    break
-
-    # Return the list of moves
-    return moves
-
-# Create a function to evaluate how good a board state is for each player using a scoring heuristic
-def evaluate(board):
-    # Initialize the score to zero
-    score = 0
-    # Loop through each row and column of the board
-    for row in range(ROWS):
-        for col in range(COLS):
-            # Check if the current slot is not empty
-            if board[row][col] != EMPTY:
-                # Check horizontal line
-                if col + WIN <= COLS:
-                    # Initialize counters for red and blue discs
-                    red_count = 0
-                    yellow_count = 0
-                    # Loop through each horizontal slot
-                    for i in range(WIN):
-                        # Check if the slot is red or blue and increment the corresponding counter
-                        if board[row][col + i] == HUMAN:
-                            red_count += 1
-                        elif board[row][col + i] == AI:
-                            yellow_count += 1
-
-                    # Calculate the line value based on the number of discs in the line (more discs = larger value)
-                    if red_count == 0 and yellow_count > 0:
-                        line_value = 10 ** (yellow_count - 1) + 10
-                    elif red_count > 0 and yellow_count == 0:
-                        line_value = -10 ** (red_count - 1) + 10
-                    elif red_count > yellow_count:
-                        line_value = 1
-                    elif red_count > yellow_count:
-                        line_value = -1
-                    else:
-                        line_value = 0
-
-                    # Add the line value to the score
-                    score += line_value
-
-                # Check vertical line
-                if row + WIN <= ROWS:
-                    # Initialize counters for red and blue discs
-                    red_count = 0
-                    yellow_count = 0
-                    # Loop through each vertical slot
-                    for i in range(WIN):
-                        # Check if the slot is red or blue and increment the corresponding counter
-                        if board[row + i][col] == HUMAN:
-                            red_count += 1
-                        elif board[row + i][col] == AI:
-                            yellow_count += 1
-
-                    # Calculate the line value based on the number of discs in the line (more discs = larger value)
-                    if red_count == 0 and yellow_count > 0:
-                        line_value = 10 ** (yellow_count - 1) + 10
-                    elif red_count > 0 and yellow_count == 0:
-                        line_value = -10 ** (red_count - 1) + 10
-                    elif red_count > yellow_count:
-                        line_value = 1
-                    elif red_count > yellow_count:
-                        line_value = -1
-                    else:
-                        line_value = 0
-
-                    # Add the line value to the score
-                    score += line_value
-
-                # Check diagonal line (positive slope)
-                if row + WIN <= ROWS and col + WIN <= COLS:
-                    # Initialize counters for red and blue discs
-                    red_count = 0
-                    yellow_count = 0
-                    # Loop through each diagonal slot
-                    for i in range(WIN):
-                        # Check if the slot is red or blue and increment the corresponding counter
-                        if board[row + i][col + i] == HUMAN:
-                            red_count += 1
-                        elif board[row + i][col + i] == AI:
-                            yellow_count += 1
-
-                    # Calculate the line value based on the number of discs in the line (more discs = larger value)
-                    if red_count == 0 and yellow_count > 0:
-                        line_value = 10 ** (yellow_count - 1) + 10
-                    elif red_count > 0 and yellow_count == 0:
-                        line_value = -10 ** (red_count - 1) + 10
-                    elif red_count > yellow_count:
-                        line_value = 1
-                    elif red_count > yellow_count:
-                        line_value = -1
-                    else:
-                        line_value = 0
-
-                    # Add the line value to the score
-                    score += line_value
-
-                # Check diagonal line (negative slope)
-                if row - WIN >= -1 and col + WIN <= COLS:
-                    # Initialize counters for red and blue discs
-                    red_count = 0
-                    yellow_count = 0
-                    # Loop through each diagonal slot
-                    for i in range(WIN):
-                        # Check if the slot is red or blue and increment the corresponding counter
-                        if board[row - i][col + i] == HUMAN:
-                            red_count += 1
-                        elif board[row - i][col + i] == AI:
-                            yellow_count += 1
-
-                    # Calculate the line value based on the number of discs in the line (more discs = larger value)
-                    if red_count == 0 and yellow_count > 0:
-                        line_value = 10 ** (yellow_count - 1) + 10
-                    elif red_count > 0 and yellow_count == 0:
-                        line_value = -10 ** (red_count - 1) + 10
-                    elif red_count > yellow_count:
-                        line_value = 1
-                    elif red_count > yellow_count:
-                        line_value = -1
-                    else:
-                        line_value = 0
-
-                    # Add the line value to the score
-                    score += line_value
-
-   # Return the score
-    return score
-
-# Create a function to implement the alpha beta pruning algorithm to find the best move for the AI player
-def alpha_beta(board, depth, alpha, beta, player):
-    # Check if the game is over or the depth limit is reached
-    if is_winner(HUMAN) or is_winner(AI) or is_full() or depth == 0:
-        # Return the score and None as the move
-        return (evaluate(board), None)
-
-    # Check if the player is the AI (maximizing player)
-    if player == AI:
-        # Initialize the best score to negative infinity and the best move to None
-        best_score = -INFINITY
-        best_move = None
-        # Generate all possible moves for the AI player
-        moves = generate_moves(board, AI)
-        # Loop through each move
-        for move in moves:
-            # Get the column and the new board state after making the move
-            col, new_board = move
-            # Recursively call the alpha beta function with the new board state, decreased depth, and switched player
-            score, _ = alpha_beta(new_board, depth - 1, alpha, beta, HUMAN)
-            # Check if the score is better than the best score
-            if score > best_score:
-                # Update the best score and the best move
-                best_score = score
-                best_move = col
-
-            # Update the alpha value with the maximum of alpha and best score
-            alpha = max(alpha, best_score)
-            # Check if alpha is greater than or equal to beta (pruning condition)
-            if alpha >= beta:
-                # Break the loop as further exploration is not needed
-                break
-
-        # Return the best score and the best move
-        return (best_score, best_move)
-
-    # Check if the player is the human (minimizing player)
-    elif player == HUMAN:
-        # Initialize the best score to positive infinity and the best move to None
-        best_score = INFINITY
-        best_move = None
-        # Generate all possible moves for the human player
-        moves = generate_moves(board, HUMAN)
-        # Loop through each move
-        for move in moves:
-            # Get the column and the new board state after making the move
-            col, new_board = move
-            # Recursively call the alpha beta function with the new board state, decreased depth, and switched player
-            score, _ = alpha_beta(new_board, depth - 1, alpha, beta, AI)
-            # Check if the score is better than the best score
-            if score < best_score:
-                # Update the best score and the best move
-                best_score = score
-                best_move = col
-
-            # Update the beta value with the minimum of beta and best score
-            beta = min(beta, best_score)
-            # Check if alpha is greater than or equal to beta (pruning condition)
-            if alpha >= beta:
-                # Break the loop as further exploration is not needed
-                break
-
-        # Return the best score and the best move
-        return (best_score, best_move)
-
-# Create a main loop to run until the user quits
-running = True
-
-while running:
-
-    # Process events (keystrokes, mouse clicks, etc.)
-    for event in pygame.event.get():
-        # Check if the event is the quit event
-        if event.type == pygame.QUIT:
-            # exit the game
-            sys.exit()
-
-        # Check if the event is a mouse click
-        elif event.type == pygame.MOUSEBUTTONDOWN:
-            # Check if the game state is running and the current player is human
-            if game_state == 'running' and current_player == HUMAN:
-                # Get the mouse position
-                mouse_x, mouse_y = pygame.mouse.get_pos()
-                # Check if the mouse position is within the board area
-                if mouse_x <= BOARD_WIDTH and  mouse_y <= BOARD_HEIGHT:
-                    # Calculate the column index based on the mouse position
-                    col = (mouse_x) // (DISC_SIZE + DISC_GAP)
-                    # Check if the top row of the column is empty
-                    if board[0][col] == EMPTY:
-                        # Loop through each row of the column from bottom to top
-                        for row in range(ROWS - 1, -1, -1):
-                            # Check if the current slot is empty
-                            if board[row][col] == EMPTY:
-                                # Drop the human disc into the empty slot
-                                board[row][col] = HUMAN
-                                # Switch the current player to AI
-                                current_player = AI
-                                # Break the loop as only one disc can be dropped per column
-                                break
-
-    # Update game logic
-
-    # Check if the game state is running
-    if game_state == 'running':
-        # Check if there is a winner or the board is full
-        if is_winner(HUMAN):
-            # Set the game state to over and the game result to win
-            game_state = 'over'
-            game_result = 'win'
-        elif is_winner(AI):
-            # Set the game state to over and the game result to lose
-            game_state = 'over'
-            game_result = 'lose'
-        elif is_full():
-            # Set the game state to over and the game result to draw
-            game_state = 'over'
-            game_result = 'draw'
+# Defining window dimensions (the board and a status line below it)
+STATUS_HEIGHT = 30
+WINDOW_WIDTH = BOARD_WIDTH
+WINDOW_HEIGHT = BOARD_HEIGHT + STATUS_HEIGHT
+
+# Number of processes the AI searches with, more than 1 splits the moves of the root between CPU cores
+AI_WORKERS = 1
+
+# Time the AI may think about each move in milliseconds (higher = harder)
+AI_TIME_MS = 1000
+# Optional depth limit for the AI search, None searches until the time runs out
+AI_MAX_DEPTH = None
+
+# Opening book made with "python -m connect4.book", used by the AI if the file exists
+OPENING_BOOK = 'opening_book.bin'
+
+# Finished games are appended to this file (read it with "python -m connect4.records"), None to not record them
+GAME_RECORD = 'games.c4r'
+
+# Seconds between two updates of the AI progress in the status line
+STATUS_INTERVAL = 0.25
+
+# Function to get the rectangle of a disc slot on the window
+def cell_rect(row, col):
+    return pygame.Rect(MARGIN + col * (DISC_SIZE + DISC_GAP), MARGIN + row * (DISC_SIZE + DISC_GAP), DISC_SIZE, DISC_SIZE)
+
+# Draws the game on the window, redrawing only what changed since the last frame
+class Renderer:
+    def __init__(self, window):
+        self.window = window
+
+        # Setting font style
+        font = pygame.font.SysFont('Arial', 60)
+        self.status_font = pygame.font.SysFont('Arial', 20)
+
+        # The empty board is drawn once and copied onto the window wherever something has to be cleared
+        self.background = pygame.Surface((WINDOW_WIDTH, WINDOW_HEIGHT))
+        # Fills the background with grey color
+        self.background.fill(GREY)
+        # Draws a blue rectangle for the board background
+        pygame.draw.rect(self.background, BLUE, (0, 0, BOARD_WIDTH, BOARD_HEIGHT))
+        # Draws a grey circle for each disc slot
+        for row in range(ROWS):
+            for col in range(COLS):
+                self.draw_disc(self.background, row, col, GREY)
+
+        # For displaying the game result, the texts are rendered once
+        self.result_texts = {
+            'win': font.render('You win!', True, BLACK),
+            'lose': font.render('You lose!', True, BLACK),
+            'draw': font.render('Draw!', True, BLACK),
+        }
+
+        # What is on the window now, None until the first frame is drawn
+        self.board = None
+        self.result = None
+        self.status = ''
+
+    # Function to draw a disc of a colour into a slot
+    def draw_disc(self, surface, row, col, colour):
+        # Calculate the position and radius of the disc slot
+        x = MARGIN + col * (DISC_SIZE + DISC_GAP) + DISC_SIZE // 2
+        y = MARGIN + row * (DISC_SIZE + DISC_GAP) + DISC_SIZE // 2
+        r = DISC_SIZE // 2 - DISC_GAP // 2
+        pygame.draw.circle(surface, colour, (x, y), r)
+
+    # Function to draw the slot of a board cell with its disc
+    def draw_cell(self, board, row, col):
+        rect = cell_rect(row, col)
+        self.window.blit(self.background, rect, rect)
+        if board[row][col] == HUMAN:
+            # Draws a red circle for the human disc
+            self.draw_disc(self.window, row, col, RED)
+        elif board[row][col] == AI:
+            # Draws a yellow circle for the AI disc
+            self.draw_disc(self.window, row, col, YELLOW)
+        return rect
+
+    # Function to bring the window up to date, nothing is drawn if nothing changed
+    # Returns the rectangles of the window that were redrawn
+    def draw(self, board, game_result, status):
+        dirty = []
+
+        # Redraw everything on the first frame and when the result text comes or goes
+        if self.board is None or game_result != self.result:
+            self.window.blit(self.background, (0, 0))
+            for row in range(ROWS):
+                for col in range(COLS):
+                    if board[row][col] != EMPTY:
+                        self.draw_cell(board, row, col)
+            if game_result is not None:
+                # Draws the text rectangle and centers it on the window
+                text = self.result_texts[game_result]
+                text_rect = text.get_rect()
+                text_rect.center = (WINDOW_WIDTH // 2, WINDOW_HEIGHT // 2)
+                self.window.blit(text, text_rect)
+            self.status = ''
+            dirty.append(self.window.get_rect())
+        else:
+            # Redraw only the cells that changed
+            for row in range(ROWS):
+                for col in range(COLS):
+                    if board[row][col] != self.board[row][col]:
+                        dirty.append(self.draw_cell(board, row, col))
+        self.board = [board_row[:] for board_row in board]
+        self.result = game_result
+
+        # Draw the status line below the board if its text changed
+        if status != self.status:
+            rect = pygame.Rect(0, BOARD_HEIGHT, WINDOW_WIDTH, WINDOW_HEIGHT - BOARD_HEIGHT)
+            self.window.blit(self.background, rect, rect)
+            if status:
+                text = self.status_font.render(status, True, BLACK)
+                text_rect = text.get_rect()
+                text_rect.midleft = (MARGIN, BOARD_HEIGHT + STATUS_HEIGHT // 2)
+                self.window.blit(text, text_rect)
+            self.status = status
+            dirty.append(rect)
+
+        # Update only the redrawn parts of the window
+        if dirty:
+            pygame.display.update(dirty)
+        return dirty
+
+# Runs the AI search on a background thread, so the window keeps drawing and handling events while the AI thinks
+class AIThinker:
+    def __init__(self, workers):
+        # One thread is enough, only one search runs at a time
+        self.executor = ThreadPoolExecutor(max_workers=1)
+        # Worker processes of the AI search if it runs in parallel
+        self.parallel_search = ParallelSearch(workers) if workers > 1 else None
+        # Result of the running search and its search context (None in parallel mode)
+        self.future = None
+        self.search = None
+        self.started = 0
+
+    # Function to check if a search is running
+    def thinking(self):
+        return self.future is not None
+
+    # Function to start searching for the best move of the player to move
+    def start(self, game):
+        self.started = time.perf_counter()
+        # Book moves are found by the game itself, without starting the worker processes
+        if self.parallel_search is not None and game.book_move() is None:
+            self.search = None
+            self.future = self.executor.submit(self.parallel_search.iterative_deepening, game.position.copy(), AI_TIME_MS, AI_MAX_DEPTH)
         else:
-            # Check if the current player is AI
-            if current_player == AI:
-                # Set a difficulty level as the depth limit for alpha beta pruning (higher = harder)
-                difficulty = 6
-                # Call the alpha beta function to find the best move for the AI player
-                _, best_move = alpha_beta(board, difficulty, ALPHA, BETA, AI)
+            self.search = SearchContext(stop=threading.Event())
+            self.future = self.executor.submit(game.best_move, AI_TIME_MS, AI_MAX_DEPTH, self.search)
+
+    # Function to get the best move once the search is done, returns None while it is still running
+    def poll(self):
+        if self.future is None or not self.future.done():
+            return None
+        best_move = self.future.result()[0]
+        self.future = None
+        return best_move
+
+    # Function to get the depth being searched and the nodes searched per second
+    def progress(self):
+        if self.search is not None:
+            depth, nodes = self.search.depth, self.search.nodes
+        else:
+            depth, nodes = self.parallel_search.depth, self.parallel_search.nodes
+        seconds = time.perf_counter() - self.started
+        return (depth, int(nodes / seconds) if seconds > 0 else 0)
+
+    # Function to stop the running search and forget its result
+    def cancel(self):
+        if self.future is None:
+            return
+        if self.search is not None:
+            self.search.stop.set()
+        else:
+            self.parallel_search.cancel()
+        self.future = None
+
+    # Function to stop the search and the background thread and processes
+    def close(self):
+        self.cancel()
+        self.executor.shutdown(wait=False)
+        if self.parallel_search is not None:
+            self.parallel_search.close()
+
+# Function to run the game until the user quits
+def main():
+    # Creating window
+    pygame.init()
+    window = pygame.display.set_mode((WINDOW_WIDTH, WINDOW_HEIGHT))
+    pygame.display.set_caption('Connect Four')
+    clock = pygame.time.Clock()
+
+    # Let the drawing thread take the interpreter back from the AI thread quickly, so frames stay on time
+    sys.setswitchinterval(0.001)
+
+    # Draws the game on the window
+    renderer = Renderer(window)
+
+    # Opening the opening book if there is one
+    book = OpeningBook(OPENING_BOOK) if os.path.exists(OPENING_BOOK) else None
+
+    # Opening the file the finished games are recorded in
+    # A game is written as soon as it ends, there are only a few of them
+    recorder = GameRecorder(GAME_RECORD, flush_games=1) if GAME_RECORD is not None else None
+
+    # Creating the game, the human moves first
+    game = Game(HUMAN, book=book, geometry=GEOMETRY)
+
+    # Grid copy of the position used for drawing the board
+    board = game.board()
+
+    # The AI searches in the background
+    ai = AIThinker(AI_WORKERS)
+
+    # Text of the status line and when the AI progress in it was last updated
+    status = ''
+    status_time = 0
+
+    # Create a main loop to run until the user quits
+    running = True
+
+    while running:
+
+        # Process events (keystrokes, mouse clicks, etc.)
+        for event in pygame.event.get():
+            # Check if the event is the quit event
+            if event.type == pygame.QUIT:
+                # Stop the AI search, write the recorded games and exit the game
+                ai.close()
+                if recorder is not None:
+                    recorder.close()
+                sys.exit()
+
+            # Check if the R key was pressed to restart the game
+            elif event.type == pygame.KEYDOWN and event.key == pygame.K_r:
+                ai.cancel()
+                game = Game(HUMAN, book=book, geometry=GEOMETRY)
+                board = game.board()
+
+            # Redraw the whole window on the next frame if it was uncovered or restored, what it showed is lost
+            elif event.type in (pygame.VIDEOEXPOSE, pygame.WINDOWEXPOSED):
+                renderer.board = None
+
+            # Check if the event is a mouse click
+            elif event.type == pygame.MOUSEBUTTONDOWN:
+                # Check if the game state is running and the current player is human
+                if game.state == 'running' and game.position.player == HUMAN:
+                    # Get the mouse position
+                    mouse_x, mouse_y = pygame.mouse.get_pos()
+                    # Check if the mouse position is within the board area
+                    if mouse_x <= BOARD_WIDTH and  mouse_y <= BOARD_HEIGHT:
+                        # Calculate the column index based on the mouse position
+                        col = (mouse_x) // (DISC_SIZE + DISC_GAP)
+                        # Check if the column exists and is not full
+                        if game.can_play(col):
+                            # Drop the human disc into the column, this switches the current player to AI
+                            game.play(col)
+                            board = game.board()
+                            if game.state == 'over' and recorder is not None:
+                                recorder.write_game(game)
+
+        # Update game logic
+
+        # Check if the game is running and the current player is AI
+        if game.state == 'running' and game.position.player == AI:
+            # Start the search in the background, or check if it has found the best move
+            if not ai.thinking():
+                ai.start(game)
+            else:
+                best_move = ai.poll()
                 # Check if the best move is not None
                 if best_move is not None:
-                    # Loop through each row of the column from bottom to top
-                    for row in reversed(range(ROWS)):
-                        # Check if the current slot is empty
-                        if board[row][best_move] == EMPTY:
-                            # Drop the AI disc into the empty slot
-                            board[row][best_move] = AI
-                            # Switch the current player to human
-                            current_player = HUMAN
-                            # Break the loop as only one disc can be dropped per column
-                            break
-
-    # Draw everything on the window
+                    # Drop the AI disc into the column, this switches the current player to human
+                    game.play(best_move)
+                    board = game.board()
+                    if game.state == 'over' and recorder is not None:
+                        recorder.write_game(game)
+
+        # Update the status line, the AI progress only a few times per second
+        if ai.thinking():
+            now = time.perf_counter()
+            if now - status_time >= STATUS_INTERVAL or not status.startswith('Thinking'):
+                depth, nodes_per_second = ai.progress()
+                status = 'Thinking... depth %d, %d nodes/s' % (depth, nodes_per_second)
+                status_time = now
+        elif game.state == 'over':
+            status = 'Press R to play again'
+        else:
+            status = ''
 
-    draw_board()
+        # Draw what changed on the window, idle frames draw nothing
 
-    # Update the window
+        renderer.draw(board, game.result, status)
 
-    pygame.display.flip()
+        # Set the frame rate
 
-    # Set the frame rate
+        clock.tick(60)
 
-    clock.tick(60)
+    # Quit pygame and exit
 
-# Quit pygame and exit
+    pygame.quit()
 
-pygame.quit()
\ No newline at end of file
+# Run the game when the file is run as a script
+if __name__ == '__main__':
+    main()
\ No newline at end of file